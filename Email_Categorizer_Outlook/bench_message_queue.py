@@ -0,0 +1,138 @@
+"""
+New-mail latency versus backlog size: Outlook order vs. the priority queue.
+
+Simulates monitor_emails on a virtual clock. A backlog of unread mail is
+already waiting, new mail arrives as a Poisson stream (a share of it urgent),
+every message a poll lists costs --scan-cost seconds (walking the Restrict
+collection and reading EntryID) and every processed message costs --cost
+seconds. "outlook" processes every unread message in Restrict order on each
+poll, as the categorizer did before the queue; "full-scan" uses MessageQueue
+but lists all unread mail on every poll; "queue" is the app: it only lists mail
+received since the newest one seen, with a full scan every FULL_SCAN_S. Prints
+ReceivedTime -> processing of new mail, i.e. including the polls it took to
+find it.
+
+    python bench_message_queue.py --backlogs 0 100 500 2000 --cost 0.02 --scan-cost 0.002 --minutes 20
+"""
+import argparse
+import random
+from collections import deque
+
+from message_queue import MessageQueue, URGENT, NORMAL, INFO
+
+POLL_SLEEP_S = 3.0
+DRAIN_BUDGET_S = 2.0
+RECHECK_AFTER_S = 300
+FULL_SCAN_S = 600
+DISCOVERY_OVERLAP_S = 120
+
+class VirtualClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+def make_arrivals(rng, rate_per_min, minutes, urgent_share):
+    arrivals, t = [], 0.0
+    while True:
+        t += rng.expovariate(rate_per_min / 60)
+        if t >= minutes * 60:
+            return arrivals
+        priority = URGENT if rng.random() < urgent_share else rng.choice((NORMAL, INFO))
+        arrivals.append((t, f"new-{len(arrivals)}", priority))
+
+def backlog_items(rng, size):
+    return [(-rng.uniform(60, 86400), f"old-{i}", rng.choice((URGENT, NORMAL, NORMAL, INFO))) for i in range(size)]
+
+def run_outlook_order(backlog, arrivals, cost, scan_cost, minutes):
+    """Every poll walks all unread mail in ReceivedTime order; nothing is marked read by the categorizer."""
+    clock, waits, pending = 0.0, {}, list(arrivals)
+    unread = [item_id for _, item_id, _ in backlog]
+    arrived_at = {}
+    while clock < minutes * 60:
+        while pending and pending[0][0] <= clock:
+            t, item_id, priority = pending.pop(0)
+            unread.append(item_id)
+            arrived_at[item_id] = (t, priority)
+        for item_id in list(unread):
+            clock += scan_cost + cost
+            if item_id in arrived_at and item_id not in waits:
+                waits[item_id] = (clock - cost - arrived_at[item_id][0], arrived_at[item_id][1])
+        clock += POLL_SLEEP_S
+    return waits
+
+def run_priority_queue(backlog, arrivals, cost, scan_cost, minutes, incremental=True):
+    clock = VirtualClock()
+    queue = MessageQueue(clock=clock)
+    waits, pending = {}, list(arrivals)
+    unread = {item_id: (received, priority) for received, item_id, priority in backlog}
+    processed_at, arrived_at = {}, {}
+    recheck_due = deque()
+    newest, last_full_scan = None, 0.0
+    while clock.now < minutes * 60:
+        while pending and pending[0][0] <= clock.now:
+            t, item_id, priority = pending.pop(0)
+            unread[item_id] = (t, priority)
+            arrived_at[item_id] = t
+        # Poll: list unread mail (all of it, or only mail newer than the newest seen) and queue what is new
+        if not incremental or newest is None or clock.now - last_full_scan >= FULL_SCAN_S:
+            last_full_scan = clock.now
+            listed = list(unread.items())
+        else:
+            listed = [(i, v) for i, v in unread.items() if v[0] >= newest - DISCOVERY_OVERLAP_S]
+        clock.now += scan_cost * len(listed)
+        for item_id, (received, priority) in listed:
+            newest = received if newest is None else max(newest, received)
+            if item_id not in processed_at:
+                queue.push(item_id, priority, received)
+        while recheck_due and clock.now - recheck_due[0][0] >= RECHECK_AFTER_S:
+            done, item_id = recheck_due.popleft()
+            received, priority = unread[item_id]
+            queue.push(item_id, priority, received, first_seen=False)
+        budget_end = clock.now + DRAIN_BUDGET_S
+        while len(queue) and clock.now < budget_end:
+            item = queue.pop()
+            processed_at[item.entry_id] = clock.now
+            recheck_due.append((clock.now, item.entry_id))
+            if item.entry_id in arrived_at and item.entry_id not in waits:
+                waits[item.entry_id] = (clock.now - arrived_at[item.entry_id], item.priority)
+            clock.now += cost
+        if not len(queue):
+            clock.now += POLL_SLEEP_S
+    return waits
+
+def describe(waits, priority=None):
+    values = sorted(w for w, p in waits.values() if priority is None or p == priority)
+    if not values:
+        return "       -"
+    p95 = values[min(len(values) - 1, int(len(values) * 0.95))]
+    return f"{p95:7.1f}s p95 / {values[-1]:7.1f}s max"
+
+def main():
+    parser = argparse.ArgumentParser(description="New-mail queue wait vs. backlog size")
+    parser.add_argument("--backlogs", type=int, nargs="+", default=[0, 100, 500, 2000])
+    parser.add_argument("--cost", type=float, default=0.02, help="seconds to process one message")
+    parser.add_argument("--scan-cost", type=float, default=0.002, help="seconds per message a poll lists (EntryID read)")
+    parser.add_argument("--rate", type=float, default=2.0, help="new mails per minute")
+    parser.add_argument("--urgent-share", type=float, default=0.2)
+    parser.add_argument("--minutes", type=float, default=20)
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    print(f"{'backlog':>8} {'mode':>9}  {'all new mail':>27}  {'urgent new mail':>27}")
+    for size in args.backlogs:
+        rng = random.Random(args.seed)
+        backlog = backlog_items(rng, size)
+        arrivals = make_arrivals(rng, args.rate, args.minutes, args.urgent_share)
+        modes = (
+            ("outlook", run_outlook_order),
+            ("full-scan", lambda *a: run_priority_queue(*a, incremental=False)),
+            ("queue", run_priority_queue),
+        )
+        for mode, runner in modes:
+            waits = runner(backlog, arrivals, args.cost, args.scan_cost, args.minutes)
+            print(f"{size:>8} {mode:>9}  {describe(waits):>27}  {describe(waits, URGENT):>27}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+"""
+Check that the subject cache never changes a decision.
+
+Runs every subject through the rules twice: uncached on the raw lower-cased
+subject (what process_message did before the cache) and through
+evaluate_subject, which shares one exact-rule cache entry between
+near-identical subjects. Lists every subject whose decisions differ and
+exits with status 1 if there are any. Needs no NumPy/SciPy.
+
+    python check_subject_cache.py --data history.csv
+    python check_subject_cache.py            # built-in sample
+"""
+import argparse
+import csv
+import sys
+
+from classification_cache import normalize_subject, sender_domain
+from email_categorizer_outlook import EmailCategorizerApp
+
+# Shapes seen in the shared mailbox, including the ones normalization must leave alone
+SAMPLE_SUBJECTS = [
+    "Request to change mobile number",
+    "RE: Request to change mobile number",
+    "RE: FW: Request to change mobile number #48213",
+    "Fwd: Unlock user account INC0012345",
+    "Reset password for VPN REQ-4411",
+    "UCUBE12345 password reset",
+    "RE: UCUBE daily report",
+    "DDT-2024 request",
+    "DTT request 2024",
+    "ddt form",
+    "reset2024",
+    "Number 5512 of open tickets",
+    "Update contact number 09171234567",
+    "Migrate phone to new device RITM0098812",
+    "Weekly newsletter #12",
+    "Meeting invite: shift handover",
+    "AW: Sv: TR: modify mobile",
+    "[EXT] RE: locked out CHG0031337",
+    "new joiner enroll",
+    # Short prefixed or numbered typos: partial_ratio scores change when RE:/FW: or digits are stripped
+    "RE: unlok acct",
+    "FW: mobil no",
+    "account unlok 4521",
+    "RE: pasword reset 77",
+    "FW: RE: updte no 3",
+    "",
+]
+
+def read_subjects(path):
+    """Subject and sender of every row of an exported history CSV."""
+    with open(path, "r", encoding="utf-8-sig", newline="") as f:
+        return [(row.get("Subject") or "", row.get("SenderEmailAddress") or "") for row in csv.DictReader(f)]
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare cached and uncached subject-rule decisions.")
+    parser.add_argument("--data", help="CSV exported with statistical_classifier.py export (default: built-in sample)")
+    args = parser.parse_args()
+
+    if args.data:
+        samples = read_subjects(args.data)
+    else:
+        samples = [(subject, "user@fpt.com") for subject in SAMPLE_SUBJECTS]
+
+    # Only the rule set is needed: no GUI, Outlook or sound
+    app = EmailCategorizerApp.__new__(EmailCategorizerApp)
+    app.configure_rules()
+    mismatches = []
+    # Two passes: the second one is answered from the cache
+    for _ in range(2):
+        for subject, sender in samples:
+            subject = subject.lower()
+            uncached = app.evaluate_subject_rules(subject)
+            cached = app.evaluate_subject(subject, sender_domain(sender))
+            if cached != uncached:
+                mismatches.append((subject, normalize_subject(subject), uncached, cached))
+
+    exact, fuzzy = app.subject_cache.stats(), app.fuzzy_cache.stats()
+    print(f"{len(samples)} subjects, {exact['size']} exact-rule entries (hit rate {exact['hit_rate']:.1%}), "
+          f"{fuzzy['size']} fuzzy entries (hit rate {fuzzy['hit_rate']:.1%})")
+    if mismatches:
+        for subject, normalized, uncached, cached in mismatches:
+            print(f"❌ {subject!r} -> {normalized!r}\n   uncached {uncached}\n   cached   {cached}")
+        sys.exit(1)
+    print("✅ Cached and uncached decisions match")
+
+if __name__ == "__main__":
+    main()
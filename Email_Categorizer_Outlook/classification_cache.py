@@ -0,0 +1,98 @@
+import re
+import threading
+from collections import OrderedDict
+
+# "RE: FW: Fwd: AW:" style reply/forward prefixes, possibly repeated ("RE[2]:")
+_PREFIX_RE = re.compile(r"^(?:\s*(?:re|fw|fwd|aw|sv|tr)\s*(?:\[\d+\])?\s*:)+", re.IGNORECASE)
+# Ticket identifiers with a known prefix (INC0012345, REQ-4411), "#123456" and standalone digit runs.
+# Never arbitrary letters+digits tokens: "UCUBE12345" or "reset2024" must still reach the keyword rules.
+TICKET_PREFIXES = ("inc", "req", "ritm", "chg", "prb", "sr", "tkt")
+_TICKET_RE = re.compile(rf"\b(?:{'|'.join(TICKET_PREFIXES)})-?\d+\b|#\d+|\b\d+\b", re.IGNORECASE)
+_WHITESPACE_RE = re.compile(r"\s+")
+
+def normalize_subject(subject):
+    """
+    Reduce a subject to the part the subject rules care about, so that
+    "RE: FW: Request to change mobile number" and
+    "Request to change mobile number #48213" share one cache entry.
+    Only text no keyword or regex rule looks at is removed, so those rules
+    give the same decision on the normalized and the raw subject. The fuzzy
+    rules score the whole string and must run on the raw subject
+    (check_subject_cache.py).
+    """
+    subject = (subject or "").lower()
+    subject = _PREFIX_RE.sub("", subject)
+    subject = _TICKET_RE.sub(" ", subject)
+    return _WHITESPACE_RE.sub(" ", subject).strip()
+
+def sender_domain(address):
+    address = (address or "").lower()
+    return address.rsplit("@", 1)[1] if "@" in address else ""
+
+class LRUCache:
+    """
+    Bounded least-recently-used cache for subject rule decisions.
+    Entries are tied to a rule-set fingerprint; when the fingerprint passed to
+    get()/put() changes, the whole cache is invalidated.
+    """
+
+    def __init__(self, maxsize=2048):
+        self.maxsize = maxsize
+        self.fingerprint = None
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _check_fingerprint(self, fingerprint):
+        if fingerprint != self.fingerprint:
+            if self._data:
+                self.invalidations += 1
+            self._data.clear()
+            self.fingerprint = fingerprint
+
+    def get(self, key, fingerprint):
+        with self._lock:
+            self._check_fingerprint(fingerprint)
+            try:
+                value = self._data[key]
+            except KeyError:
+                self.misses += 1
+                return None
+            self._data.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, key, value, fingerprint):
+        with self._lock:
+            self._check_fingerprint(fingerprint)
+            self._data[key] = value
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    @property
+    def hit_rate(self):
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+    def stats(self):
+        with self._lock:
+            return {
+                "size": len(self._data),
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "invalidations": self.invalidations,
+                "hit_rate": self.hit_rate,
+            }
+
+    def __len__(self):
+        return len(self._data)
@@ -0,0 +1,134 @@
+"""
+Compare the hand-tuned rules in EmailCategorizerApp.process_message with the
+statistical classifier on the same exported corpus.
+
+Reports accuracy, precision, recall and messages/sec for each, plus how
+often the two agree. The rules are timed twice: without the subject caches
+(the per-message rule cost) and with them, as in the app. Either evaluate an already trained model:
+
+    python compare_classifiers.py --data history.csv --model categorizer_model.npz
+
+or train on part of the corpus and evaluate both on the rest:
+
+    python compare_classifiers.py --data history.csv --train-fraction 0.8
+"""
+import argparse
+import os
+import random
+import time
+
+import numpy as np
+
+from classification_cache import LRUCache
+from conversation_index import ConversationIndex
+from email_categorizer_outlook import EmailCategorizerApp
+from statistical_classifier import LinearClassifier, message_text, read_history
+
+class RecordedAttachment:
+    def __init__(self, file_name):
+        self.FileName = file_name
+
+class RecordedAttachments(list):
+    @property
+    def Count(self):
+        return len(self)
+
+class RecordedMessage:
+    """Stand-in for an Outlook MailItem built from an exported CSV row."""
+
+    def __init__(self, row):
+        self.Subject = row.get("Subject") or ""
+        self.SenderName = row.get("SenderName") or row.get("SenderEmailAddress") or ""
+        self.SenderEmailAddress = row.get("SenderEmailAddress") or ""
+        self.Body = row.get("Body") or ""
+        self.Categories = ""  # Evaluate as if nobody had categorized it yet
+        self.ConversationID = None
+        self.Attachments = RecordedAttachments(
+            RecordedAttachment(name) for name in (row.get("Attachments") or "").split("; ") if name)
+        self.saved = False
+
+    def Save(self):
+        self.saved = True
+
+def rules_evaluator(cached=True):
+    """An EmailCategorizerApp with its rule set but no GUI, Outlook or sound."""
+    app = EmailCategorizerApp.__new__(EmailCategorizerApp)
+    app.configure_rules()
+    if not cached:
+        # A cache that keeps nothing: every message runs every subject rule
+        app.subject_cache = LRUCache(maxsize=0)
+        app.fuzzy_cache = LRUCache(maxsize=0)
+    app.conversation_index = ConversationIndex(os.devnull)
+    app.decision_store = None
+    app.coordinator = None
+    app.allowed_categories = {}
+    app.selected_category = "EVALUATION"
+    app.log_message = lambda message: None
+    return app
+
+def score(predictions, labels):
+    predictions = np.asarray(predictions, dtype=bool)
+    labels = np.asarray(labels, dtype=bool)
+    true_positive = np.sum(predictions & labels)
+    return {
+        "accuracy": float(np.mean(predictions == labels)),
+        "precision": float(true_positive / max(np.sum(predictions), 1)),
+        "recall": float(true_positive / max(np.sum(labels), 1)),
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare rule-based and model-based categorization.")
+    parser.add_argument("--data", required=True, help="CSV exported with statistical_classifier.py export")
+    parser.add_argument("--model", default="categorizer_model.npz")
+    parser.add_argument("--train-fraction", type=float, default=None,
+                        help="train a fresh model on this share of the corpus and evaluate on the rest")
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    texts, labels, rows = read_history(args.data)
+
+    if args.train_fraction:
+        order = list(range(len(rows)))
+        random.Random(args.seed).shuffle(order)
+        cut = int(len(order) * args.train_fraction)
+        train, test = order[:cut], order[cut:]
+        model = LinearClassifier().fit([texts[i] for i in train], [labels[i] for i in train])
+        rows = [rows[i] for i in test]
+        labels = [labels[i] for i in test]
+    else:
+        model = LinearClassifier.load(args.model)
+
+    # Rules: the production process_message, one message at a time, without and with the subject caches
+    rules_runs = []
+    for cached in (False, True):
+        app = rules_evaluator(cached)
+        messages = [RecordedMessage(row) for row in rows]
+        start = time.perf_counter()
+        for message in messages:
+            app.process_message(message)
+        rules_runs.append((time.perf_counter() - start, [message.saved for message in messages]))
+    (rules_elapsed, rules_predictions), (cached_elapsed, _) = rules_runs
+
+    # Model: one batch per corpus, as in a poll
+    start = time.perf_counter()
+    batch = [message_text(m.Subject, [a.FileName for a in m.Attachments]) for m in messages]
+    model_predictions = model.predict_proba(batch) >= model.threshold
+    model_elapsed = time.perf_counter() - start
+
+    print(f"Corpus: {len(messages)} messages ({sum(labels)} categorized)")
+    print(f"{'':<11} {'accuracy':>9} {'precision':>10} {'recall':>8} {'msg/s':>12}")
+    for name, predictions, elapsed in (
+        ("rules", rules_predictions, rules_elapsed),
+        ("rules+cache", rules_predictions, cached_elapsed),
+        ("model", model_predictions, model_elapsed),
+    ):
+        s = score(predictions, labels)
+        rate = len(messages) / elapsed if elapsed else float("inf")
+        print(f"{name:<11} {s['accuracy']:>9.1%} {s['precision']:>10.1%} {s['recall']:>8.1%} {rate:>12,.0f}")
+
+    agreement = np.mean(np.asarray(rules_predictions, dtype=bool) == model_predictions)
+    print(f"Agreement between rules and model: {agreement:.1%}")
+    print(f"Rule subject cache hit rate: {app.subject_cache.hit_rate:.1%} exact, {app.fuzzy_cache.hit_rate:.1%} fuzzy")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+
+class ConversationIndex:
+    """
+    Bounded map of Outlook ConversationID -> category decision.
+    Replies in a thread that was already categorized inherit the category in
+    O(1) without running the rule pipeline or reading the message body.
+    Least-recently-used conversations are evicted past `maxsize`, and the index
+    is persisted as JSON so decisions survive restarts.
+    """
+
+    VERSION = 1
+
+    def __init__(self, path="conversation_index.json", maxsize=5000):
+        self.path = path
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.dirty = False
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, conversation_id):
+        with self._lock:
+            entry = self._data.get(conversation_id)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._data.move_to_end(conversation_id)
+            self.hits += 1
+            return entry[0]
+
+    def put(self, conversation_id, category):
+        with self._lock:
+            entry = self._data.get(conversation_id)
+            if entry is not None and entry[0] == category:
+                self._data.move_to_end(conversation_id)
+                return
+            self._data[conversation_id] = (category, time.time())
+            self._data.move_to_end(conversation_id)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+                self.evictions += 1
+            self.dirty = True
+
+    def load(self):
+        """Load a previously saved index. A missing or unreadable file starts an empty index."""
+        if not os.path.exists(self.path):
+            return 0
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                payload = json.load(f)
+        except (OSError, ValueError):
+            return 0
+        if not isinstance(payload, dict) or payload.get("version") != self.VERSION:
+            return 0
+        with self._lock:
+            self._data.clear()
+            # Entries are stored oldest-first, so the newest survive the size bound
+            for conversation_id, category, saved_at in payload.get("entries", [])[-self.maxsize:]:
+                self._data[conversation_id] = (category, saved_at)
+            self.dirty = False
+            return len(self._data)
+
+    def save(self):
+        """Write the index atomically if it changed since the last save."""
+        with self._lock:
+            if not self.dirty:
+                return False
+            entries = [[cid, category, saved_at] for cid, (category, saved_at) in self._data.items()]
+            self.dirty = False
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"version": self.VERSION, "entries": entries}, f, ensure_ascii=False)
+        os.replace(tmp_path, self.path)
+        return True
+
+    def __len__(self):
+        return len(self._data)
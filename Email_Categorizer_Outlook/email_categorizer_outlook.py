@@ -11,13 +11,60 @@ import os
 import sys
 from win10toast import ToastNotifier
 from pathlib import Path
+from collections import namedtuple, OrderedDict, deque
+from datetime import datetime, timedelta
 import logging
+from classification_cache import LRUCache, normalize_subject, sender_domain
+from conversation_index import ConversationIndex
+from message_queue import MessageQueue, PRIORITY_NAMES, URGENT, NORMAL, INFO
+
+# Decision history, the resource watchdog and poller coordination are shared with SupportCompanion
+for shared_dir in ("decision_history", "resource_watchdog", "coordination"):
+    sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", shared_dir))
+try:
+    from decision_store import open_store
+except ImportError:
+    open_store = None
+try:
+    from resource_watchdog import ResourceWatchdog
+except ImportError:
+    ResourceWatchdog = None
+try:
+    from poller_coordinator import open_coordinator
+except ImportError:
+    open_coordinator = None
+
+WATCHDOG_INTERVAL = 60        # seconds between resource samples
+WATCHDOG_LIMITS = {
+    "rss_mb": 400,            # clear caches and trim the log box
+    "com_objects": 500,       # re-create the Outlook COM session
+}
+LOG_TRIM_LINES = 500          # lines kept in the log box after a trim
+COORDINATION_GROUP = "categorizer"  # with L1_COORD_DIR set, only the elected instance runs Restrict
+DRAIN_BUDGET_S = 2.0          # seconds of processing before polling again, so new mail jumps the backlog
+RECHECK_AFTER_S = 300         # an unread message already processed is queued again at most this often
+FULL_SCAN_S = 600             # all unread mail is listed this often; other polls only ask for mail newer than the last seen
+DISCOVERY_OVERLAP_S = 120     # Restrict compares ReceivedTime to the minute, so look back this far past the newest mail seen
+MODEL_BATCH = 64              # queued messages scored per predict_proba call in model mode
+
+# Substring/regex rules: only look at words normalize_subject keeps, cached per normalized subject + sender domain
+ExactDecision = namedtuple("ExactDecision", [
+    "ddt_request",            # DDT/DTT + "request" edge case
+    "number_without_action",  # mentions "number" but no change/update/... verb
+    "primary_keyword",
+    "regex_matched",
+    "secondary_only",         # DDT keyword without any primary keyword
+])
+# partial_ratio scores depend on the length of the whole subject, so these are cached per raw subject
+FuzzyDecision = namedtuple("FuzzyDecision", ["fuzzy_matched", "advanced_fuzzy_matched"])
+# Result of the subject-side rules
+SubjectDecision = namedtuple("SubjectDecision", ExactDecision._fields + FuzzyDecision._fields)
 
 class EmailCategorizerApp:
     def __init__(self, root):
         self.root = root
         self.root.title("Email Categorizer v3")
-        self.root.geometry("520x450")
+        self.root.geometry("520x520")
 
         # Setup logging to file and GUI
         self.setup_logging()
@@ -27,13 +74,10 @@ class EmailCategorizerApp:
 
         # Configurable parameters
         self.shared_mailbox = "LE-HELPDESK.PH@fpt.com"
-        self.primary_keywords = [
-            "change", "update", "migrate", "migration", "modify", "mobile", "number", "phone",
-            "unlock", "reset", "enroll", "new", "locked"
-        ]
-        self.secondary_keywords = ["ddt"]
-        self.excluded_keywords = ["UCUBE"]
-        self.excluded_senders = ["LE-HELPDESK.PH"]
+        self.configure_rules()
+        self.conversation_index = ConversationIndex("conversation_index.json", maxsize=5000)
+        self.model_path = "categorizer_model.npz"
+        self.model = None  # Loaded lazily when "Use trained model" is ticked
         self.running = False
         self.selected_category = None
         self.monitor_thread = None
@@ -43,10 +87,61 @@ class EmailCategorizerApp:
 
         # Setup GUI components
         self.create_widgets()
+        self.root.protocol("WM_DELETE_WINDOW", self.on_close)
 
         # Initialize pygame mixer for sound
         pygame.mixer.init()
 
+        self.decision_store = open_store("categorizer") if open_store else None
+        self.recorded_skips = OrderedDict()  # (kind, EntryID) already written, so unread skips aren't re-logged every poll
+
+        self.reconnect_requested = False
+        self.watchdog = self.start_watchdog() if ResourceWatchdog else None
+
+        self.message_queue = MessageQueue()
+        self.known_messages = OrderedDict()  # EntryID -> [priority, received, processed_at or None]
+        self.recheck_due = deque()           # (processed_at, EntryID) in processing order
+        self.newest_received = None          # ReceivedTime of the newest unread mail seen; None = list all unread next poll
+        self.last_full_scan = 0.0
+
+        self.coordinator = None
+        self.relayed_lock = threading.Lock()
+        self.relayed_unread = None           # [EntryID, priority, received] the poller found since our last poll
+        self.relayed_ready = threading.Event()
+
+        loaded = self.conversation_index.load()
+        if loaded:
+            self.log_message(f"🧵 Loaded {loaded} known conversations")
+
+    def configure_rules(self):
+        """Keyword, regex and fuzzy rule set used by process_message."""
+        self.primary_keywords = [
+            "change", "update", "migrate", "migration", "modify", "mobile", "number", "phone",
+            "unlock", "reset", "enroll", "new", "locked"
+        ]
+        self.secondary_keywords = ["ddt"]
+        self.excluded_keywords = ["UCUBE"]
+        self.excluded_senders = ["LE-HELPDESK.PH"]
+        self.urgent_keywords = ["unlock", "locked", "reset", "password"]  # queued ahead of other mail
+        self.subject_regex_patterns = [
+            r"\\bchange.*number\\b",
+            r"\\bupdate.*number\\b",
+            r"\\bmodify.*mobile\\b",
+            r"\\breset.*password\\b",
+            r"\\bunlock.*user\\b",
+            r"\\brequest.*change.*number\\b"
+        ]
+        self.subject_fuzzy_patterns = [
+            "change mobile number",
+            "update contact number",
+            "reset user password",
+            "unlock user",
+            "migrate phone",
+            "modify phone number"
+        ]
+        self.subject_cache = LRUCache(maxsize=2048)
+        self.fuzzy_cache = LRUCache(maxsize=2048)
+
     def setup_logging(self):
         self.logger = logging.getLogger("EmailCategorizer")
         self.logger.setLevel(logging.DEBUG)
@@ -86,6 +181,11 @@ class EmailCategorizerApp:
             btn.grid(row=row, column=col, padx=10, pady=5)
             self.category_buttons[category] = btn
 
+        # Classifier mode toggle (model needs numpy/scipy and a trained categorizer_model.npz)
+        self.use_model_var = tk.BooleanVar(value=False)
+        self.use_model_check = tk.Checkbutton(self.root, text="Use trained model", variable=self.use_model_var)
+        self.use_model_check.pack()
+
         # Stop button
         self.stop_button = tk.Button(
             self.root, text="STOP", command=self.stop_monitoring,
@@ -98,6 +198,11 @@ class EmailCategorizerApp:
         self.status_label = tk.Label(self.root, textvariable=self.status_var, font=("Arial", 10, "italic"))
         self.status_label.pack(pady=2)
 
+        # Resource watchdog trend line
+        self.resource_var = tk.StringVar(value="Resources: -")
+        tk.Label(self.root, textvariable=self.resource_var, font=("Arial", 9), fg="gray").pack()
+        tk.Button(self.root, text="Heap Snapshot", command=self.heap_snapshot, font=("Arial", 9)).pack()
+
         # Log box
         self.log_box = scrolledtext.ScrolledText(self.root, width=65, height=15, font=("Arial", 10))
         self.log_box.pack(padx=10, pady=10)
@@ -105,11 +210,52 @@ class EmailCategorizerApp:
     def log_message(self, message):
         self.logger.info(message)
 
+    def start_watchdog(self):
+        watchdog = ResourceWatchdog(
+            interval=WATCHDOG_INTERVAL,
+            limits=WATCHDOG_LIMITS,
+            on_sample=lambda sample, wd: self.root.after(
+                0, lambda text=wd.summary(): self.resource_var.set(f"Resources: {text}")),
+            on_message=self.log_message,
+        )
+        watchdog.register_mitigation("rss_mb", "clear caches", self.clear_caches)
+        watchdog.register_mitigation("rss_mb", "trim log", lambda: self.root.after(0, self.trim_log))
+        watchdog.register_mitigation("com_objects", "re-create Outlook COM session", self.request_reconnect)
+        watchdog.start()
+        return watchdog
+
+    def clear_caches(self):
+        self.subject_cache.clear()
+        self.fuzzy_cache.clear()
+        self.recorded_skips.clear()
+
+    def trim_log(self):
+        self.log_box.delete("1.0", f"end-{LOG_TRIM_LINES + 1}l")
+
+    def request_reconnect(self):
+        # Picked up by monitor_emails before its next poll
+        self.reconnect_requested = True
+
+    def heap_snapshot(self):
+        if not self.watchdog:
+            self.log_message("⚠️ Resource watchdog not available.")
+            return
+
+        def snapshot():
+            lines = self.watchdog.snapshot_heap()
+            self.log_message("🔬 Heap snapshot (top allocations):")
+            for line in lines:
+                self.log_message(f"   {line}")
+
+        threading.Thread(target=snapshot, daemon=True).start()
+
     def start_monitoring(self, category):
         if self.running:
             messagebox.showinfo("Info", "Monitoring is already running. Please stop it first.")
             return
 
+        self.model = self.load_model() if self.use_model_var.get() else None
+
         self.selected_category = category
         self.running = True
         self.status_var.set(f"Status: Monitoring for '{category}'")
@@ -119,6 +265,8 @@ class EmailCategorizerApp:
         self.set_buttons_state(tk.DISABLED)
         self.stop_button.config(state=tk.NORMAL)
 
+        self.coordinator = self.start_coordinator() if open_coordinator else None
+
         self.monitor_thread = threading.Thread(target=self.monitor_emails, daemon=True)
         self.monitor_thread.start()
 
@@ -127,6 +275,9 @@ class EmailCategorizerApp:
             return
         self.running = False
         self.selected_category = None
+        coordinator, self.coordinator = self.coordinator, None
+        if coordinator:
+            coordinator.stop()  # Releases the lease so another agent's copy takes over right away
         self.status_var.set("Status: Stopped")
         self.log_message("🛑 Monitoring stopped.")
 
@@ -134,22 +285,202 @@ class EmailCategorizerApp:
         self.set_buttons_state(tk.NORMAL)
         self.stop_button.config(state=tk.DISABLED)
 
+    def on_close(self):
+        self.stop_monitoring()
+        if self.decision_store is not None:
+            self.decision_store.close()  # Flush queued decisions before the writer thread dies with the process
+        self.root.destroy()
+
     def set_buttons_state(self, state):
         for btn in self.category_buttons.values():
             btn.config(state=state)
+        self.use_model_check.config(state=state)
+
+    def start_coordinator(self):
+        coordinator = open_coordinator(COORDINATION_GROUP, on_event=self.on_poller_event, on_message=self.log_message)
+        if coordinator:
+            with self.relayed_lock:
+                self.relayed_unread = None
+            coordinator.start()
+        return coordinator
+
+    def on_poller_event(self, event):
+        # Called on the coordinator's feed thread
+        if event.get("type") == "unread":
+            with self.relayed_lock:
+                # The poller only sends what it found this poll, so keep everything until our next poll
+                self.relayed_unread = (self.relayed_unread or []) + event.get("messages", [])
+            self.relayed_ready.set()
+        elif event.get("type") == "categorized":
+            self.log_message(f"🛰️ {event.get('node')} tagged a message as {event.get('category')} ({event.get('rule')})")
+
+    def take_relayed_unread(self):
+        """Follower mode: unread mail the poller found since the last call (instead of a Restrict of our own)."""
+        with self.relayed_lock:
+            unread, self.relayed_unread = self.relayed_unread or [], None
+            self.relayed_ready.clear()
+        return unread
+
+    def find_unread(self, inbox):
+        """
+        Unread mail for this poll -> ([EntryID, priority, received], full scan?).
+        Most polls only ask Outlook for mail received since the newest one already
+        seen, so a poll reads a few items however large the unread backlog is.
+        The first poll and one every FULL_SCAN_S list all unread mail, to pick up
+        mail marked unread again or delivered with an older ReceivedTime.
+        """
+        now = time.monotonic()
+        query = "[Unread] = true"
+        full = self.newest_received is None or now - self.last_full_scan >= FULL_SCAN_S
+        if full:
+            self.last_full_scan = now
+        else:
+            since = datetime.fromtimestamp(self.newest_received) - timedelta(seconds=DISCOVERY_OVERLAP_S)
+            query += f" AND [ReceivedTime] >= '{since.strftime('%m/%d/%Y %I:%M %p')}'"
+        messages = inbox.Items.Restrict(query)
+        unread = self.scan_unread(messages)
+        # Release the Restrict collection and its MailItem proxies; queued mail is reopened by EntryID
+        messages = None
+        return unread, full
+
+    def scan_unread(self, messages):
+        """Read EntryID (plus Subject/ReceivedTime the first time) of each unread message -> [EntryID, priority, received]."""
+        unread = []
+        for message in messages:
+            try:
+                entry_id = message.EntryID
+                known = self.known_messages.get(entry_id)
+                if known is None:
+                    known = [self.message_priority(message.Subject), self.received_timestamp(message), None]
+                    self.remember_message(entry_id, known)
+            except Exception as e:
+                self.log_message(f"❌ Error reading email: {str(e)}")
+                continue
+            unread.append([entry_id, known[0], known[1]])
+            if self.newest_received is None or known[1] > self.newest_received:
+                self.newest_received = known[1]
+        return unread
+
+    def enqueue_unread(self, unread):
+        """Queue messages never processed; processed ones come back through enqueue_rechecks."""
+        queued = 0
+        for entry_id, priority, received in unread:
+            known = self.known_messages.get(entry_id)
+            if known is None:
+                known = [priority, received, None]
+                self.remember_message(entry_id, known)
+            if known[2] is None:
+                queued += self.message_queue.push(entry_id, priority, received, first_seen=True)
+        return queued
+
+    def enqueue_rechecks(self):
+        """Queue processed messages again once RECHECK_AFTER_S has passed; drain_queue forgets them when read."""
+        now = time.monotonic()
+        queued = 0
+        while self.recheck_due and now - self.recheck_due[0][0] >= RECHECK_AFTER_S:
+            processed_at, entry_id = self.recheck_due.popleft()
+            known = self.known_messages.get(entry_id)
+            if known is None or known[2] != processed_at:
+                continue  # Read or gone meanwhile, or already processed again
+            queued += self.message_queue.push(entry_id, known[0], known[1], first_seen=False)
+        return queued
+
+    def remember_message(self, entry_id, known):
+        self.known_messages[entry_id] = known
+        self.known_messages.move_to_end(entry_id)
+        if len(self.known_messages) > 10000:
+            self.known_messages.popitem(last=False)
+
+    def message_priority(self, subject):
+        """Queue class from the rule keywords: unlock/reset first, mail without any rule keyword last."""
+        subject = (subject or "").lower()
+        if any(keyword in subject for keyword in self.urgent_keywords):
+            return URGENT
+        if any(keyword in subject for keyword in self.primary_keywords + self.secondary_keywords):
+            return NORMAL
+        return INFO
+
+    def received_timestamp(self, message):
+        try:
+            return message.ReceivedTime.replace(tzinfo=None).timestamp()
+        except Exception:
+            return 0.0
+
+    def open_message(self, namespace, inbox, entry_id, failures):
+        """The queued message if it is still there and unread, else None. Lookup errors are appended to `failures`."""
+        try:
+            # The shared mailbox is not the default store: without its StoreID every lookup fails
+            message = namespace.GetItemFromID(entry_id, inbox.StoreID)
+            return message if message.UnRead else None
+        except Exception as e:
+            failures.append(e)  # Moved or deleted meanwhile, or the store is unreachable
+            return None
+
+    def drain_queue(self, namespace, inbox):
+        """Process queued messages in priority order for up to DRAIN_BUDGET_S, then return so the next poll can queue new mail."""
+        budget_end = time.monotonic() + DRAIN_BUDGET_S
+        batch_size = MODEL_BATCH if self.model is not None else 1
+        processed = 0
+        failures = []
+        while self.running and len(self.message_queue) and time.monotonic() < budget_end:
+            batch = []
+            while len(batch) < batch_size:
+                item = self.message_queue.pop()
+                if item is None:
+                    break
+                message = self.open_message(namespace, inbox, item.entry_id, failures)
+                if message is None:
+                    # Read, moved or deleted: stop re-checking it (a full scan finds it again if it is still unread)
+                    self.known_messages.pop(item.entry_id, None)
+                    continue
+                known = self.known_messages.get(item.entry_id)
+                if known is not None:
+                    known[2] = time.monotonic()
+                    self.recheck_due.append((known[2], item.entry_id))
+                if item.first_seen:
+                    self.record_queue_wait(item)
+                batch.append(message)
+            if not batch:
+                continue
+            processed += len(batch)
+            try:
+                if self.model is not None:
+                    self.process_batch_with_model(batch)
+                else:
+                    self.process_message(batch[0])
+            except Exception as e:
+                # e.g. predict_proba on a corrupt or mismatched model: skip this batch, keep monitoring
+                self.log_message(f"❌ Error processing email: {str(e)}")
+        if failures:
+            # Never silent: a follower that can open nothing would otherwise tag nothing without a trace
+            self.log_message(f"⚠️ {len(failures)} queued message(s) could not be opened (last error: {failures[-1]})")
+        return processed
+
+    def record_queue_wait(self, item):
+        """Time in the queue, and since ReceivedTime (which includes the polls it took to discover the message)."""
+        if self.decision_store is None:
+            return
+        source = PRIORITY_NAMES[item.priority]
+        self.decision_store.record("queue_wait", source=source, latency_ms=item.wait * 1000)
+        if item.received:
+            # received is a naive local ReceivedTime converted with timestamp(), so time.time() is the matching clock
+            self.decision_store.record("received_wait", source=source, latency_ms=(time.time() - item.received) * 1000)
+
+    def load_model(self):
+        try:
+            from statistical_classifier import LinearClassifier
+            model = LinearClassifier.load(self.model_path)
+        except Exception as e:
+            self.log_message(f"⚠️ Could not load model '{self.model_path}', using rules instead: {e}")
+            return None
+        self.log_message(f"🤖 Using trained model '{self.model_path}' (threshold {model.threshold:.2f})")
+        return model
 
     def monitor_emails(self):
         try:
             self.log_message(f"🔄 Connecting to Outlook... Monitoring for '{self.selected_category}'")
             pythoncom.CoInitialize()
-            outlook = win32com.client.Dispatch("Outlook.Application")
-            namespace = outlook.GetNamespace("MAPI")
-
-            inbox = None
-            for account in namespace.Folders:
-                if account.Name == self.shared_mailbox:
-                    inbox = account.Folders["Inbox"]
-                    break
+            namespace, inbox = self.connect_inbox()
 
             if inbox is None:
                 self.log_message(f"❌ Unable to find inbox for {self.shared_mailbox}")
@@ -162,26 +493,65 @@ class EmailCategorizerApp:
             self.log_message(f"🚀 Monitoring emails... Assigning category: {self.selected_category}")
 
             while self.running:
-                self.log_message("📩 Checking unread emails...")
-
-                messages = inbox.Items.Restrict("[Unread] = true")
-
-                for message in messages:
-                    try:
-                        self.process_message(message)
-                    except Exception as e:
-                        self.log_message(f"❌ Error processing email: {str(e)}")
-
-                self.log_message("🔄 Checking again in 3 seconds...")
-                time.sleep(3)
+                if self.reconnect_requested:
+                    self.reconnect_requested = False
+                    namespace = inbox = None  # Drop the old proxies before dispatching again
+                    namespace, inbox = self.connect_inbox()
+                    if inbox is None:
+                        self.log_message(f"❌ Unable to find inbox for {self.shared_mailbox} after reconnect")
+                        break
+                    self.log_message("🔌 Outlook COM session re-created")
+
+                # One reference per poll: stop_monitoring clears self.coordinator from the Tk thread
+                coordinator = self.coordinator
+                following = coordinator is not None and not coordinator.is_leader
+                if following:
+                    unread = self.take_relayed_unread()
+                else:
+                    self.log_message("📩 Checking unread emails...")
+                    unread, full = self.find_unread(inbox)
+                    if coordinator:
+                        # Poller only: the other copies queue from this list instead of running Restrict.
+                        # Only full scans are retained, so a copy that joins late starts from the whole list.
+                        coordinator.publish({"type": "unread", "messages": unread, "count": len(unread)},
+                                            retain="unread" if full else None)
+
+                # Newest and most urgent mail first; the rest waits for the next drain
+                self.enqueue_unread(unread)
+                self.enqueue_rechecks()
+                processed = self.drain_queue(namespace, inbox)
+
+                if processed:
+                    self.log_cache_stats()
+                    self.log_message(f"📥 {self.message_queue.stats()}")
+                self.save_conversation_index()
+
+                if len(self.message_queue):
+                    continue  # Backlog left: poll again right away (only new mail is read) so it is queued ahead
+                if following:
+                    self.relayed_ready.wait(3)  # Wake as soon as the poller reports new mail
+                else:
+                    self.log_message("🔄 Checking again in 3 seconds...")
+                    time.sleep(3)
 
         except Exception as e:
             self.log_message(f"❌ Unexpected error: {str(e)}")
 
         finally:
+            self.message_queue.clear()
+            self.newest_received = None  # Mail dropped from the queue is found again by the next start's full scan
+            self.save_conversation_index()
             pythoncom.CoUninitialize()
             self.stop_monitoring()
 
+    def connect_inbox(self):
+        outlook = win32com.client.Dispatch("Outlook.Application")
+        namespace = outlook.GetNamespace("MAPI")
+        for account in namespace.Folders:
+            if account.Name == self.shared_mailbox:
+                return namespace, account.Folders["Inbox"]
+        return namespace, None
+
     def process_message(self, message):
         subject = (message.Subject or "").lower()
         sender = (message.SenderName or "").lower()
@@ -190,39 +560,38 @@ class EmailCategorizerApp:
         # Exclusions
         if any(excluded.lower() in sender for excluded in self.excluded_senders):
             self.log_message(f"🚫 Ignoring email from {message.SenderName}: {message.Subject}")
+            self.record_decision("excluded", message, rule="excluded_sender")
             return
 
-        if any(excluded.lower() in subject for excluded in self.excluded_keywords):
+        # Hard exclusions apply to replies too; only the rule pipeline is skipped for known threads
+        if self.has_excluded_keyword(subject):
             self.log_message(f"🚫 Ignoring email (excluded keyword): {message.Subject}")
+            self.record_decision("excluded", message, rule="excluded_keyword")
             return
 
-        regex_patterns = [
-            r"\\bchange.*number\\b",
-            r"\\bupdate.*number\\b",
-            r"\\bmodify.*mobile\\b",
-            r"\\breset.*password\\b",
-            r"\\bunlock.*user\\b",
-            r"\\brequest.*change.*number\\b"
-        ]
-        regex_matched = any(re.search(pattern, subject) for pattern in regex_patterns)
+        # Replies in an already-categorized thread inherit its category without running the rules
+        conversation_id = self.get_conversation_id(message)
+        inherited_category = self.conversation_index.get(conversation_id) if conversation_id else None
+        if inherited_category:
+            self.apply_inherited_category(message, existing_categories, inherited_category)
+            return
+
+        decision = self.evaluate_subject(subject, sender_domain(message.SenderEmailAddress))
 
         # Edge case for DDT/DTT + request
         matched_by_fallback = False
-        if ("dtt" in subject or "ddt" in subject) and "request" in subject:
+        if decision.ddt_request:
             self.log_message("✨ Edge-case match: Subject contains 'ddt/dtt' and 'request'")
             matched_by_fallback = True
 
-        if "number" in subject and not any(kw in subject for kw in ["change", "update", "modify", "reset", "migrate"]):
+        if decision.number_without_action:
             self.log_message(f"🚫 Skipping email (Contains 'number' but lacks relevant action): {message.Subject}")
             return
 
         body = (message.Body or "").lower()
 
-        if not (
-            any(keyword in subject for keyword in self.primary_keywords)
-            or regex_matched
-            or self.fuzzy_match_keywords(subject, self.primary_keywords)
-        ):
+        subject_matched = decision.primary_keyword or decision.regex_matched or decision.fuzzy_matched
+        if not subject_matched:
             if self.fuzzy_match_keywords(body, self.primary_keywords):
                 self.log_message(f"📬 Matched via body content: {message.Subject or '(no subject)'}")
                 matched_by_fallback = True
@@ -248,51 +617,255 @@ class EmailCategorizerApp:
 
         match_sources = []
 
-        if any(keyword in subject for keyword in self.primary_keywords):
+        if decision.primary_keyword:
             match_sources.append("🔑 primary keyword (subject)")
 
-        if regex_matched:
+        if decision.regex_matched:
             match_sources.append("📏 regex match")
 
-        if self.fuzzy_match_keywords(subject, self.primary_keywords):
+        if decision.fuzzy_matched:
             match_sources.append("🤏 fuzzy match")
 
         if matched_by_fallback:
             match_sources.append("🔁 fallback match (body or attachments)")
 
-        if (
-            any(keyword in subject for keyword in self.primary_keywords)
-            or regex_matched
-            or self.fuzzy_match_keywords(subject, self.primary_keywords)
-            or matched_by_fallback
-            or self.advanced_fuzzy_match(subject, [
-                "change mobile number",
-                "update contact number",
-                "reset user password",
-                "unlock user",
-                "migrate phone",
-                "modify phone number"
-            ])
-        ):
-
-            if any(sec in subject for sec in self.secondary_keywords) and not any(kw in subject for kw in self.primary_keywords):
+        if subject_matched or matched_by_fallback or decision.advanced_fuzzy_matched:
+
+            if decision.secondary_only:
                 self.log_message(f"🚫 Ignoring email (DDT but no relevant keyword): {message.Subject}")
                 return
 
-            if existing_categories and self.selected_category not in existing_categories:
-                self.log_message(f"🚫 Skipping email (Already assigned to {', '.join(existing_categories)}): {message.Subject}")
+            if decision.primary_keyword:
+                rule = "primary_keyword"
+            elif decision.regex_matched:
+                rule = "regex"
+            elif decision.fuzzy_matched:
+                rule = "fuzzy"
+            elif matched_by_fallback:
+                rule = "fallback"
+            else:
+                rule = "advanced_fuzzy"
+            self.tag_message(message, existing_categories, conversation_id, match_sources, rule)
+
+    def tag_message(self, message, existing_categories, conversation_id, match_sources, rule):
+        if existing_categories and self.selected_category not in existing_categories:
+            self.log_message(f"🚫 Skipping email (Already assigned to {', '.join(existing_categories)}): {message.Subject}")
+            self.remember_conversation(conversation_id, existing_categories)
+            self.record_decision("skipped", message, category=existing_categories[0], rule="already_assigned",
+                                 conversation_id=conversation_id)
+            return
+
+        if self.selected_category in existing_categories:
+            self.log_message(f"⚠️ Email already categorized as '{self.selected_category}': {message.Subject}")
+            self.remember_conversation(conversation_id, existing_categories)
+            return
+
+        self.log_message(f"🟢 Categorizing: {message.Subject}")
+        self.log_message(f"📋 Reason for tagging: {', '.join(match_sources)}")
+        existing_categories.append(self.selected_category)
+        message.Categories = "; ".join(existing_categories)
+        message.Save()
+        self.remember_conversation(conversation_id, [self.selected_category])
+        self.record_decision("categorized", message, category=self.selected_category, rule=rule,
+                             conversation_id=conversation_id)
+        coordinator = self.coordinator  # May be cleared from the Tk thread meanwhile
+        if coordinator:
+            # No subject: helpdesk mail content never leaves this machine over the feed
+            coordinator.publish({"type": "categorized", "node": coordinator.node_id,
+                                 "category": self.selected_category, "rule": rule})
+
+    def record_decision(self, kind, message, category=None, rule=None, conversation_id=None):
+        """Queue a row for the decision history; the store writes it in batches on its own thread."""
+        if self.decision_store is None:
+            return
+        if kind in ("excluded", "skipped"):
+            # These messages stay unread and come back every poll; record them once
+            try:
+                key = (kind, message.EntryID)
+            except Exception:
+                key = None
+            if key in self.recorded_skips:
                 return
+            if key is not None:
+                self.recorded_skips[key] = True
+                if len(self.recorded_skips) > 10000:
+                    self.recorded_skips.popitem(last=False)
+        latency_ms = None
+        try:
+            # ReceivedTime is Outlook local wall-clock time, so compare against naive local now()
+            received = message.ReceivedTime.replace(tzinfo=None)
+            latency_ms = (datetime.now() - received).total_seconds() * 1000
+        except Exception:
+            pass
+        self.decision_store.record(
+            kind, category=category, rule=rule, source="email", subject=message.Subject,
+            conversation_id=conversation_id, latency_ms=latency_ms,
+        )
+
+    def process_batch_with_model(self, messages):
+        """
+        Model mode: apply the hard exclusions and conversation inheritance per
+        message, then score every remaining message of this poll in one
+        vectorized predict_proba call.
+        """
+        from statistical_classifier import message_text
+
+        processed = 0
+        candidates = []
+        for message in messages:
+            processed += 1
+            try:
+                sender = (message.SenderName or "").lower()
+                subject = (message.Subject or "").lower()
+                existing_categories = message.Categories.split("; ") if message.Categories else []
+
+                if any(excluded.lower() in sender for excluded in self.excluded_senders):
+                    self.log_message(f"🚫 Ignoring email from {message.SenderName}: {message.Subject}")
+                    self.record_decision("excluded", message, rule="excluded_sender")
+                    continue
+
+                if self.has_excluded_keyword(subject):
+                    self.log_message(f"🚫 Ignoring email (excluded keyword): {message.Subject}")
+                    self.record_decision("excluded", message, rule="excluded_keyword")
+                    continue
+
+                conversation_id = self.get_conversation_id(message)
+                inherited_category = self.conversation_index.get(conversation_id) if conversation_id else None
+                if inherited_category:
+                    self.apply_inherited_category(message, existing_categories, inherited_category)
+                    continue
+
+                attachment_names = [att.FileName for att in message.Attachments] if message.Attachments.Count > 0 else []
+                candidates.append((message, existing_categories, conversation_id, message_text(subject, attachment_names)))
+            except Exception as e:
+                self.log_message(f"❌ Error processing email: {str(e)}")
+
+        if not candidates:
+            return processed
+
+        scores = self.model.predict_proba([text for _, _, _, text in candidates])
+        for (message, existing_categories, conversation_id, _), score in zip(candidates, scores):
+            if score < self.model.threshold:
+                continue
+            try:
+                self.tag_message(message, existing_categories, conversation_id, [f"🤖 model score {score:.2f}"], "model")
+            except Exception as e:
+                self.log_message(f"❌ Error processing email: {str(e)}")
+        return processed
+
+    def get_conversation_id(self, message):
+        """
+        ConversationID identifies the thread; fall back to the 22-byte header of
+        ConversationIndex (44 hex chars), which is shared by every reply.
+        """
+        try:
+            conversation_id = message.ConversationID
+        except Exception:
+            conversation_id = None
+        if conversation_id:
+            return conversation_id
+        try:
+            conversation_index = message.ConversationIndex
+        except Exception:
+            return None
+        return conversation_index[:44] if conversation_index else None
 
-            if self.selected_category in existing_categories:
-                self.log_message(f"⚠️ Email already categorized as '{self.selected_category}': {message.Subject}")
+    def remember_conversation(self, conversation_id, categories):
+        if not conversation_id:
+            return
+        for category in categories:
+            if category in self.allowed_categories:
+                self.conversation_index.put(conversation_id, category)
                 return
 
-            self.log_message(f"🟢 Categorizing: {message.Subject}")
-            self.log_message(f"📋 Reason for tagging: {', '.join(match_sources)}")
-            existing_categories.append(self.selected_category)
-            message.Categories = "; ".join(existing_categories)
-            message.Save()
+    def apply_inherited_category(self, message, existing_categories, category):
+        if category in existing_categories:
+            self.log_message(f"⚠️ Email already categorized as '{category}': {message.Subject}")
+            return
+
+        if existing_categories:
+            self.log_message(f"🚫 Skipping email (Already assigned to {', '.join(existing_categories)}): {message.Subject}")
+            return
+
+        self.log_message(f"🧵 Categorizing as '{category}' (same conversation): {message.Subject}")
+        existing_categories.append(category)
+        message.Categories = "; ".join(existing_categories)
+        message.Save()
+        self.record_decision("inherited", message, category=category, rule="conversation",
+                             conversation_id=self.get_conversation_id(message))
+
+    def save_conversation_index(self):
+        try:
+            self.conversation_index.save()
+        except Exception as e:
+            self.log_message(f"⚠️ Could not save conversation index: {e}")
+
+    def evaluate_subject(self, subject, domain):
+        """
+        Run the subject-side rules through the LRU caches.
+        For the exact rules near-identical subjects (RE:/FW: chains, ticket
+        numbers) share one entry; the fuzzy rules are cached per raw subject.
+        Both caches drop everything when rules_fingerprint() changes.
+        """
+        fingerprint = self.rules_fingerprint()
+        normalized = normalize_subject(subject)
+        key = (normalized, domain)
+        exact = self.subject_cache.get(key, fingerprint)
+        if exact is None:
+            exact = self.evaluate_exact_rules(normalized)
+            self.subject_cache.put(key, exact, fingerprint)
+        fuzzy = self.fuzzy_cache.get(subject, fingerprint)
+        if fuzzy is None:
+            fuzzy = self.evaluate_fuzzy_rules(subject)
+            self.fuzzy_cache.put(subject, fuzzy, fingerprint)
+        return SubjectDecision(*exact, *fuzzy)
+
+    def has_excluded_keyword(self, subject):
+        return any(excluded.lower() in subject for excluded in self.excluded_keywords)
+
+    def evaluate_subject_rules(self, subject):
+        """All subject-side rules on `subject`, uncached."""
+        return SubjectDecision(*self.evaluate_exact_rules(subject), *self.evaluate_fuzzy_rules(subject))
+
+    def evaluate_exact_rules(self, subject):
+        primary_keyword = any(keyword in subject for keyword in self.primary_keywords)
+        return ExactDecision(
+            ddt_request=("dtt" in subject or "ddt" in subject) and "request" in subject,
+            number_without_action="number" in subject and not any(
+                kw in subject for kw in ["change", "update", "modify", "reset", "migrate"]),
+            primary_keyword=primary_keyword,
+            regex_matched=any(re.search(pattern, subject) for pattern in self.subject_regex_patterns),
+            secondary_only=any(sec in subject for sec in self.secondary_keywords) and not primary_keyword,
+        )
+
+    def evaluate_fuzzy_rules(self, subject):
+        return FuzzyDecision(
+            fuzzy_matched=self.fuzzy_match_keywords(subject, self.primary_keywords),
+            advanced_fuzzy_matched=self.advanced_fuzzy_match(subject, self.subject_fuzzy_patterns),
+        )
 
+    def rules_fingerprint(self):
+        return hash((
+            tuple(self.primary_keywords),
+            tuple(self.secondary_keywords),
+            tuple(self.excluded_keywords),
+            tuple(self.subject_regex_patterns),
+            tuple(self.subject_fuzzy_patterns),
+        ))
+
+    def log_cache_stats(self):
+        for name, cache in (("Subject", self.subject_cache), ("Fuzzy", self.fuzzy_cache)):
+            stats = cache.stats()
+            self.log_message(
+                f"🧠 {name} cache: hit rate {stats['hit_rate']:.1%} "
+                f"(hits {stats['hits']}, misses {stats['misses']}, evictions {stats['evictions']}, "
+                f"invalidations {stats['invalidations']}, size {stats['size']})"
+            )
+        index = self.conversation_index
+        self.log_message(
+            f"🧵 Conversation index: {len(index)} threads "
+            f"(inherited {index.hits}, new {index.misses}, evictions {index.evictions})"
+        )
 
     def fuzzy_match_keywords(self, subject, keywords, threshold=90):
         subject = subject.lower()
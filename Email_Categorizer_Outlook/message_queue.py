@@ -0,0 +1,120 @@
+import collections
+import heapq
+import itertools
+import time
+
+# Priority classes, most urgent first
+URGENT, NORMAL, INFO = 0, 1, 2
+PRIORITY_NAMES = {URGENT: "urgent", NORMAL: "normal", INFO: "info"}
+# Seconds an item may wait before it counts as overdue and is aged ahead of fresher mail
+DEFAULT_DEADLINES = {URGENT: 30, NORMAL: 120, INFO: 600}
+
+class QueuedMessage:
+    __slots__ = ("entry_id", "priority", "received", "enqueued", "deadline", "first_seen", "seq", "wait")
+
+    def __init__(self, entry_id, priority, received, enqueued, deadline, first_seen, seq):
+        self.entry_id = entry_id
+        self.priority = priority
+        self.received = received      # epoch seconds of ReceivedTime, newest served first
+        self.enqueued = enqueued      # queue clock
+        self.deadline = deadline
+        self.first_seen = first_seen  # False when an unread message is re-checked later
+        self.seq = seq
+        self.wait = None              # seconds spent queued, set by pop()
+
+class MessageQueue:
+    """
+    Unread messages waiting for the rules, keyed by EntryID.
+
+    Fresh items are served by (priority class, newest ReceivedTime). Items past
+    their class deadline are overdue and get `overdue_share` of the pops, oldest
+    deadline first, so a backlog still drains while new mail keeps a bounded
+    wait no matter how large the backlog is.
+    """
+
+    def __init__(self, deadlines=None, overdue_share=0.5, clock=time.monotonic, history=1000):
+        self.deadlines = {**DEFAULT_DEADLINES, **(deadlines or {})}
+        self.overdue_share = overdue_share
+        self.clock = clock
+        self.served = 0
+        self.served_overdue = 0
+        self.waits = {priority: collections.deque(maxlen=history) for priority in PRIORITY_NAMES}
+        self._by_priority = []   # (priority, -received, seq)
+        self._by_deadline = []   # (deadline, seq)
+        self._items = {}         # entry_id -> QueuedMessage
+        self._by_seq = {}        # seq -> QueuedMessage, for lazy deletion from both heaps
+        self._seq = itertools.count()
+        self._overdue_credit = 0.0
+
+    def __len__(self):
+        return len(self._items)
+
+    def __contains__(self, entry_id):
+        return entry_id in self._items
+
+    def push(self, entry_id, priority, received, first_seen=True):
+        """Queue a message unless it is already waiting. Returns True if it was added."""
+        if entry_id in self._items:
+            return False
+        now = self.clock()
+        seq = next(self._seq)
+        item = QueuedMessage(entry_id, priority, received, now, now + self.deadlines[priority], first_seen, seq)
+        self._items[entry_id] = item
+        self._by_seq[seq] = item
+        heapq.heappush(self._by_priority, (priority, -received, seq))
+        heapq.heappush(self._by_deadline, (item.deadline, seq))
+        return True
+
+    def _top(self, heap):
+        # Drop heap entries whose item was already served through the other heap
+        while heap and heap[0][-1] not in self._by_seq:
+            heapq.heappop(heap)
+        return self._by_seq[heap[0][-1]] if heap else None
+
+    def pop(self):
+        """Next message to process, or None when empty. Sets item.wait."""
+        fresh = self._top(self._by_priority)
+        if fresh is None:
+            return None
+        now = self.clock()
+        oldest = self._top(self._by_deadline)
+        item = fresh
+        if oldest.deadline <= now and oldest is not fresh:
+            self._overdue_credit += self.overdue_share
+            if self._overdue_credit >= 1:
+                self._overdue_credit -= 1
+                item = oldest
+        del self._by_seq[item.seq]
+        del self._items[item.entry_id]
+        item.wait = now - item.enqueued
+        self.served += 1
+        if item.deadline <= now:
+            self.served_overdue += 1
+        if item.first_seen:
+            self.waits[item.priority].append(item.wait)
+        return item
+
+    def overdue(self):
+        now = self.clock()
+        return sum(1 for item in self._items.values() if item.deadline <= now)
+
+    def clear(self):
+        self._by_priority.clear()
+        self._by_deadline.clear()
+        self._items.clear()
+        self._by_seq.clear()
+
+    def wait_percentile(self, priority, q):
+        waits = sorted(self.waits[priority])
+        if not waits:
+            return None
+        return waits[min(len(waits) - 1, int(len(waits) * q))]
+
+    def stats(self):
+        """One-line summary for the log, e.g. 'queue 12 (3 overdue) · urgent p95 0.4s · normal p95 2.1s'."""
+        parts = [f"queue {len(self)} ({self.overdue()} overdue)"]
+        for priority, name in PRIORITY_NAMES.items():
+            p95 = self.wait_percentile(priority, 0.95)
+            if p95 is not None:
+                parts.append(f"{name} p95 {p95:.1f}s max {max(self.waits[priority]):.1f}s")
+        return " · ".join(parts)
@@ -0,0 +1,220 @@
+"""
+Optional model-based categorization.
+
+A hashed character n-gram linear classifier (logistic regression) trained
+offline from historical Outlook categorizations. Every unread message of a
+poll is vectorized into one sparse matrix and scored with a single
+matrix-vector product, instead of running the keyword/regex/fuzzy chain per
+message.
+
+Export history, train and use:
+
+    python statistical_classifier.py export --out history.csv --days 90
+    python statistical_classifier.py train --data history.csv --out categorizer_model.npz
+
+Requires numpy and scipy (only when model mode is used).
+"""
+import argparse
+import csv
+import time
+import zlib
+
+import numpy as np
+from scipy import sparse
+from scipy.optimize import minimize
+
+MODEL_VERSION = 1
+CSV_FIELDS = ["Subject", "SenderEmailAddress", "Attachments", "Categories", "ReceivedTime"]
+
+def message_text(subject, attachment_names=()):
+    """Text fed to the model: the subject plus attachment file names (never the body)."""
+    text = (subject or "").lower()
+    if attachment_names:
+        text += " | " + " ".join(name.lower() for name in attachment_names)
+    return text
+
+class HashedCharNgramVectorizer:
+    """
+    Maps text to an L2-normalized sparse vector of hashed character n-grams.
+    crc32 keeps the hashing stable across processes (str hash() is salted).
+    """
+
+    def __init__(self, n_features=2 ** 18, ngram_min=2, ngram_max=4):
+        if n_features & (n_features - 1):
+            raise ValueError("n_features must be a power of two")
+        self.n_features = n_features
+        self.ngram_min = ngram_min
+        self.ngram_max = ngram_max
+
+    def _indices(self, text):
+        padded = f" {text} "
+        mask = self.n_features - 1
+        indices = set()
+        for n in range(self.ngram_min, self.ngram_max + 1):
+            for i in range(len(padded) - n + 1):
+                indices.add(zlib.crc32(padded[i:i + n].encode("utf-8")) & mask)
+        return indices
+
+    def transform(self, texts):
+        indptr = [0]
+        indices = []
+        data = []
+        for text in texts:
+            row = self._indices(text)
+            indices.extend(row)
+            if row:
+                data.extend([1.0 / np.sqrt(len(row))] * len(row))
+            indptr.append(len(indices))
+        return sparse.csr_matrix(
+            (np.asarray(data, dtype=np.float32), np.asarray(indices, dtype=np.int32), np.asarray(indptr, dtype=np.int64)),
+            shape=(len(texts), self.n_features),
+        )
+
+class LinearClassifier:
+    """Binary logistic regression over hashed n-gram features: 1 = categorize, 0 = leave alone."""
+
+    def __init__(self, vectorizer=None, threshold=0.5):
+        self.vectorizer = vectorizer or HashedCharNgramVectorizer()
+        self.threshold = threshold
+        self.weights = np.zeros(self.vectorizer.n_features, dtype=np.float32)
+        self.bias = 0.0
+
+    def fit(self, texts, labels, l2=1e-4, max_iter=200):
+        X = self.vectorizer.transform(texts).astype(np.float64)
+        y = np.asarray(labels, dtype=np.float64)
+        n_samples = X.shape[0]
+
+        def loss_and_grad(params):
+            w, b = params[:-1], params[-1]
+            z = X @ w + b
+            # log(1 + exp(z)) - y*z, computed stably
+            loss = np.sum(np.logaddexp(0, z) - y * z) / n_samples + 0.5 * l2 * (w @ w)
+            error = (1.0 / (1.0 + np.exp(-z)) - y) / n_samples
+            grad_w = X.T @ error + l2 * w
+            return loss, np.append(grad_w, error.sum())
+
+        x0 = np.zeros(X.shape[1] + 1)
+        result = minimize(loss_and_grad, x0, jac=True, method="L-BFGS-B", options={"maxiter": max_iter})
+        self.weights = result.x[:-1].astype(np.float32)
+        self.bias = float(result.x[-1])
+        return self
+
+    def predict_proba(self, texts):
+        """Score all texts at once: one sparse matrix times the weight vector."""
+        if not texts:
+            return np.zeros(0, dtype=np.float32)
+        z = self.vectorizer.transform(texts) @ self.weights + self.bias
+        return 1.0 / (1.0 + np.exp(-z))
+
+    def predict(self, texts):
+        return self.predict_proba(texts) >= self.threshold
+
+    def save(self, path):
+        np.savez_compressed(
+            path,
+            version=MODEL_VERSION,
+            weights=self.weights,
+            bias=self.bias,
+            threshold=self.threshold,
+            n_features=self.vectorizer.n_features,
+            ngram_min=self.vectorizer.ngram_min,
+            ngram_max=self.vectorizer.ngram_max,
+        )
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path) as model:
+            if int(model["version"]) != MODEL_VERSION:
+                raise ValueError(f"Unsupported model version {int(model['version'])} in {path}")
+            vectorizer = HashedCharNgramVectorizer(
+                int(model["n_features"]), int(model["ngram_min"]), int(model["ngram_max"]))
+            classifier = cls(vectorizer, float(model["threshold"]))
+            classifier.weights = model["weights"].astype(np.float32)
+            classifier.bias = float(model["bias"])
+        return classifier
+
+# === Training data ===
+def read_history(path):
+    """
+    Read an exported history CSV. A row is labelled 1 when Outlook shows any
+    category on it, 0 otherwise. Attachments are '; '-separated file names.
+    """
+    texts, labels, rows = [], [], []
+    with open(path, "r", encoding="utf-8-sig", newline="") as f:
+        for row in csv.DictReader(f):
+            attachments = [a for a in (row.get("Attachments") or "").split("; ") if a]
+            texts.append(message_text(row.get("Subject"), attachments))
+            labels.append(1 if (row.get("Categories") or "").strip() else 0)
+            rows.append(row)
+    return texts, labels, rows
+
+def export_history(out_path, mailbox, days):
+    """Dump recent Inbox items of the shared mailbox with their categories to CSV."""
+    import pythoncom
+    import win32com.client
+
+    pythoncom.CoInitialize()
+    try:
+        namespace = win32com.client.Dispatch("Outlook.Application").GetNamespace("MAPI")
+        inbox = None
+        for account in namespace.Folders:
+            if account.Name == mailbox:
+                inbox = account.Folders["Inbox"]
+                break
+        if inbox is None:
+            raise SystemExit(f"❌ Unable to find inbox for {mailbox}")
+
+        since = time.strftime("%m/%d/%Y %I:%M %p", time.localtime(time.time() - days * 86400))
+        items = inbox.Items.Restrict(f"[ReceivedTime] >= '{since}'")
+        count = 0
+        with open(out_path, "w", encoding="utf-8", newline="") as f:
+            writer = csv.DictWriter(f, fieldnames=CSV_FIELDS)
+            writer.writeheader()
+            for item in items:
+                try:
+                    writer.writerow({
+                        "Subject": item.Subject or "",
+                        "SenderEmailAddress": item.SenderEmailAddress or "",
+                        "Attachments": "; ".join(att.FileName for att in item.Attachments),
+                        "Categories": item.Categories or "",
+                        "ReceivedTime": str(item.ReceivedTime),
+                    })
+                    count += 1
+                except Exception:
+                    continue  # Meeting requests, reports etc. lack some MailItem fields
+        print(f"📤 Exported {count} messages to {out_path}")
+    finally:
+        pythoncom.CoUninitialize()
+
+def main():
+    parser = argparse.ArgumentParser(description="Train or export data for the statistical email classifier.")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    export = sub.add_parser("export", help="export categorized history from Outlook to CSV")
+    export.add_argument("--out", default="history.csv")
+    export.add_argument("--mailbox", default="LE-HELPDESK.PH@fpt.com")
+    export.add_argument("--days", type=int, default=90)
+
+    train = sub.add_parser("train", help="train a model from an exported CSV")
+    train.add_argument("--data", required=True)
+    train.add_argument("--out", default="categorizer_model.npz")
+    train.add_argument("--threshold", type=float, default=0.5)
+    train.add_argument("--l2", type=float, default=1e-4)
+
+    args = parser.parse_args()
+    if args.command == "export":
+        export_history(args.out, args.mailbox, args.days)
+        return
+
+    texts, labels, _ = read_history(args.data)
+    if len(set(labels)) < 2:
+        raise SystemExit("❌ Training data needs both categorized and uncategorized messages")
+    start = time.perf_counter()
+    classifier = LinearClassifier(threshold=args.threshold).fit(texts, labels, l2=args.l2)
+    elapsed = time.perf_counter() - start
+    accuracy = float(np.mean(classifier.predict(texts) == np.asarray(labels, dtype=bool)))
+    classifier.save(args.out)
+    print(f"✅ Trained on {len(texts)} messages in {elapsed:.1f}s (training accuracy {accuracy:.1%}) -> {args.out}")
+
+if __name__ == "__main__":
+    main()
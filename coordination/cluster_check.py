@@ -0,0 +1,250 @@
+"""
+Multi-process check of the poller election on one host.
+
+Starts N instances (separate processes) sharing a temporary lease folder and
+127.0.0.1 feeds. Whoever is elected "polls" every --poll seconds and publishes
+the result; followers log what they receive. Every --kill-every seconds the
+current poller is killed (alternating SIGKILL and a clean SIGTERM) and a
+fresh instance is started in its place. Reports failover time, periods with
+two pollers or none, polls saved versus every instance polling, and feed
+delivery. Exits with status 1 when a threshold is exceeded.
+
+    python cluster_check.py --instances 5 --ttl 3 --duration 60 --kill-every 12
+"""
+import argparse
+import json
+import os
+import shutil
+import signal
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+# === Instance (child process) ===
+def run_instance(name, coord_dir, ttl, poll):
+    sys.path.insert(0, HERE)
+    from poller_coordinator import PollerCoordinator
+
+    lock = threading.Lock()
+
+    def emit(kind, **fields):
+        with lock:
+            print(json.dumps({"t": time.time(), "node": name, "kind": kind, **fields}), flush=True)
+
+    coordinator = PollerCoordinator(
+        "cluster_check", coord_dir, node_id=name, ttl=ttl, host="127.0.0.1",
+        on_role_change=lambda is_leader, lease: emit("role", leader=is_leader),
+        on_event=lambda message: emit("recv", seq=message.get("seq")),
+        on_message=lambda text: emit("log", text=text),
+    )
+    stopping = threading.Event()
+    signal.signal(signal.SIGTERM, lambda *_: stopping.set())
+    emit("start")
+    coordinator.start()
+
+    polls = 0
+    while not stopping.wait(poll):
+        if coordinator.is_leader:
+            polls += 1
+            seq = f"{name}-{polls}"
+            emit("poll", seq=seq)
+            coordinator.publish({"type": "unread", "seq": seq, "count": polls}, retain="unread")
+    coordinator.stop()
+    emit("exit")
+
+# === Orchestrator ===
+class Cluster:
+    def __init__(self, args):
+        self.args = args
+        self.coord_dir = tempfile.mkdtemp(prefix="l1_coord_")
+        self.events = []
+        self.lock = threading.Lock()
+        self.processes = {}   # name -> Popen
+        self.started = {}     # name -> start time
+        self.ended = {}       # name -> kill/exit time
+        self.kills = []       # (time, name, signal name)
+        self.counter = 0
+
+    def spawn(self):
+        self.counter += 1
+        name = f"node{self.counter}"
+        cmd = [sys.executable, os.path.abspath(__file__), "--child", name, "--dir", self.coord_dir,
+               "--ttl", str(self.args.ttl), "--poll", str(self.args.poll)]
+        process = subprocess.Popen(cmd, stdout=subprocess.PIPE, text=True)
+        self.processes[name] = process
+        self.started[name] = time.time()
+        threading.Thread(target=self.read, args=(process,), daemon=True).start()
+
+    def read(self, process):
+        for line in process.stdout:
+            try:
+                event = json.loads(line)
+            except ValueError:
+                continue
+            with self.lock:
+                self.events.append(event)
+
+    def leaders(self):
+        """Nodes whose latest role event says leader and that are still running."""
+        roles = {}
+        with self.lock:
+            for event in self.events:
+                if event["kind"] == "role":
+                    roles[event["node"]] = event["leader"]
+        return [node for node, leader in roles.items() if leader and node not in self.ended]
+
+    def kill_leader(self, clean):
+        leaders = self.leaders()
+        if not leaders:
+            return
+        name = leaders[0]
+        process = self.processes[name]
+        process.send_signal(signal.SIGTERM if clean else signal.SIGKILL)
+        now = time.time()
+        self.kills.append((now, name, "SIGTERM" if clean else "SIGKILL"))
+        if not clean:
+            self.ended[name] = now
+        process.wait()
+        self.ended.setdefault(name, now)
+        self.spawn()
+
+    def run(self):
+        for _ in range(self.args.instances):
+            self.spawn()
+        start = time.time()
+        next_kill = start + self.args.kill_every
+        clean = False
+        while time.time() - start < self.args.duration:
+            time.sleep(0.1)
+            # Leave room at the end for the last failover to complete
+            if self.args.kill_every and time.time() >= next_kill and next_kill < start + self.args.duration - 2 * self.args.ttl:
+                self.kill_leader(clean)
+                clean = not clean
+                next_kill += self.args.kill_every
+        self.end = time.time()
+        for name, process in self.processes.items():
+            if process.poll() is None:
+                process.terminate()
+        for process in self.processes.values():
+            process.wait()
+        shutil.rmtree(self.coord_dir, ignore_errors=True)
+
+    def summary(self):
+        args = self.args
+        with self.lock:
+            events = sorted(self.events, key=lambda e: e["t"])
+
+        # Leader timeline: overlaps (two pollers) and gaps (none), after the first election
+        leader_state = {}
+        first_elected = None
+        overlap = gap = 0.0
+        last_t = None
+        for event in events:
+            t = event["t"]
+            if last_t is not None and first_elected is not None:
+                count = sum(1 for node, leader in leader_state.items()
+                            if leader and self.ended.get(node, float("inf")) > last_t)
+                if count > 1:
+                    overlap += t - last_t
+                elif count == 0:
+                    gap += t - last_t
+            if event["kind"] == "role":
+                leader_state[event["node"]] = event["leader"]
+                if event["leader"] and first_elected is None:
+                    first_elected = t
+            last_t = t
+
+        failovers = {"SIGKILL": [], "SIGTERM": []}
+        for kill_t, name, sig in self.kills:
+            elected = [e["t"] for e in events if e["kind"] == "role" and e["leader"] and e["t"] > kill_t and e["node"] != name]
+            if elected:
+                failovers[sig].append(elected[0] - kill_t)
+
+        polls = [e for e in events if e["kind"] == "poll"]
+        received = {}
+        for event in events:
+            if event["kind"] == "recv":
+                received.setdefault(event["seq"], set()).add(event["node"])
+        expected = delivered = 0
+        for poll in polls:
+            t = poll["t"]
+            for node, started in self.started.items():
+                # Followers that had time to find the poller and stayed up long enough to receive
+                if node == poll["node"] or t - started < args.ttl * 2 or self.ended.get(node, self.end) < t + 1:
+                    continue
+                expected += 1
+                delivered += node in received.get(poll["seq"], ())
+
+        elapsed = self.end - (first_elected or self.end)
+        standalone_polls = args.instances * elapsed / args.poll
+        return {
+            "instances": args.instances,
+            "kills": len(self.kills),
+            "first_election_s": (first_elected - min(self.started.values())) if first_elected else float("nan"),
+            "failover_sigkill_max_s": max(failovers["SIGKILL"], default=0.0),
+            "failover_sigterm_max_s": max(failovers["SIGTERM"], default=0.0),
+            "missed_failovers": len(self.kills) - sum(len(v) for v in failovers.values()),
+            "two_pollers_s": overlap,
+            "no_poller_s": gap,
+            "polls": len(polls),
+            "polls_if_standalone": round(standalone_polls),
+            "poll_reduction_x": standalone_polls / len(polls) if polls else 0.0,
+            "delivery_ratio": delivered / expected if expected else 1.0,
+        }
+
+    def check(self, summary):
+        args = self.args
+        limits = [
+            ("failover_sigkill_max_s", summary["failover_sigkill_max_s"], args.max_failover, max),
+            ("failover_sigterm_max_s", summary["failover_sigterm_max_s"], args.max_failover, max),
+            ("missed_failovers", summary["missed_failovers"], 0, max),
+            ("two_pollers_s", summary["two_pollers_s"], args.max_overlap, max),
+            ("delivery_ratio", summary["delivery_ratio"], args.min_delivery, min),
+        ]
+        failed = []
+        for name, value, limit, kind in limits:
+            if (kind is max and value > limit) or (kind is min and value < limit):
+                failed.append((name, value, limit))
+        return failed
+
+def main():
+    parser = argparse.ArgumentParser(description="Check poller election and failover with several local processes.")
+    parser.add_argument("--instances", type=int, default=5)
+    parser.add_argument("--ttl", type=float, default=3, help="lease time-to-live in seconds")
+    parser.add_argument("--poll", type=float, default=0.5, help="seconds between polls on the elected poller")
+    parser.add_argument("--duration", type=float, default=60)
+    parser.add_argument("--kill-every", type=float, default=12, help="seconds between poller kills (0 = never)")
+    parser.add_argument("--max-failover", type=float, help="seconds (default 2 x ttl)")
+    parser.add_argument("--max-overlap", type=float, help="seconds with two pollers (default ttl / 3 per kill)")
+    parser.add_argument("--min-delivery", type=float, default=0.95)
+    parser.add_argument("--child", help=argparse.SUPPRESS)
+    parser.add_argument("--dir", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        run_instance(args.child, args.dir, args.ttl, args.poll)
+        return
+
+    args.max_failover = args.max_failover or 2 * args.ttl
+    cluster = Cluster(args)
+    cluster.run()
+    summary = cluster.summary()
+    if args.max_overlap is None:
+        args.max_overlap = args.ttl / 3 * max(1, summary["kills"])
+
+    print("\n=== Cluster summary ===")
+    for key, value in summary.items():
+        print(f"{key:<26} {value:,.2f}" if isinstance(value, float) else f"{key:<26} {value}")
+    failed = cluster.check(summary)
+    if failed:
+        for name, value, limit in failed:
+            print(f"❌ {name} = {value:,.2f} outside limit {limit}")
+        sys.exit(1)
+    print("✅ All cluster thresholds met")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,413 @@
+"""
+Single-poller coordination shared by the Email Categorizer and SupportCompanion.
+
+Every running copy on the shift joins an election group (one per app) through
+a lease file in a shared folder (L1_COORD_DIR, e.g. a UNC share). The holder
+of the lease is the only instance that polls the shared mailbox; it renews the
+lease every ttl/3 seconds and serves its events to the other instances over a
+small TCP feed (newline-delimited JSON) whose address and access token are
+written in the lease. The feed listens only on the advertised address and
+drops connections that do not open with the token, so only machines that can
+read the lease folder can follow.
+Followers read the lease, subscribe to the feed and take over once the lease
+has not changed for `ttl` seconds by their own clock, so machine clock skew
+does not matter. A clean shutdown deletes the lease for immediate failover.
+"""
+import hmac
+import json
+import os
+import secrets
+import socket
+import threading
+import time
+
+DEFAULT_TTL = 15
+
+def node_identity():
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+def advertise_host():
+    """Address other machines use to reach this instance's feed (L1_COORD_HOST overrides)."""
+    host = os.environ.get("L1_COORD_HOST")
+    if host:
+        return host
+    try:
+        return socket.gethostbyname(socket.gethostname())
+    except OSError:
+        return "127.0.0.1"
+
+# === Lease file ===
+class LeaseFile:
+    """JSON lease on a shared folder. Writes go through a temp file and os.replace so readers never see a torn file on local disks."""
+
+    def __init__(self, path):
+        self.path = path
+
+    def read(self):
+        """The current lease, None if there is none. Raises ValueError if it is being rewritten (unknown this round)."""
+        try:
+            with open(self.path, encoding="utf-8") as f:
+                text = f.read()
+        except FileNotFoundError:
+            return None
+        lease = json.loads(text)  # JSONDecodeError is a ValueError
+        if not isinstance(lease, dict) or "node" not in lease:
+            raise ValueError("malformed lease")
+        return lease
+
+    def create(self, lease):
+        """Write the lease only if none exists. Returns False if another instance created it first."""
+        try:
+            fd = os.open(self.path, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+        except FileExistsError:
+            return False
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(lease, f)
+        return True
+
+    def write(self, lease):
+        tmp_path = f"{self.path}.{lease['node'].replace(':', '_')}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(lease, f)
+        os.replace(tmp_path, self.path)
+
+    def remove_if_owner(self, node):
+        try:
+            if (self.read() or {}).get("node") == node:
+                os.remove(self.path)
+        except (OSError, ValueError):
+            pass
+
+# === Event feed ===
+class EventServer(threading.Thread):
+    """
+    Leader side of the feed: accepts followers that open with `token` and sends
+    every published message to all of them. Messages published with a `retain`
+    key are kept (latest per key) and replayed to followers when they connect.
+    """
+
+    def __init__(self, hello, token, host, port=0, send_timeout=1.0):
+        super().__init__(daemon=True, name="CoordinationServer")
+        self.hello = hello
+        self.token = token
+        self.send_timeout = send_timeout
+        self.listener = socket.create_server((host, port))
+        self.port = self.listener.getsockname()[1]
+        self.clients = []
+        self.retained = {}
+        self.lock = threading.Lock()
+        self.closed = False
+
+    def run(self):
+        while not self.closed:
+            try:
+                conn, _ = self.listener.accept()
+            except OSError:
+                break  # Listener closed
+            conn.settimeout(self.send_timeout)
+            if not self._authenticate(conn):
+                conn.close()
+                continue
+            with self.lock:
+                try:
+                    for message in [self.hello] + list(self.retained.values()):
+                        conn.sendall(encode(message))
+                except OSError:
+                    conn.close()
+                    continue
+                self.clients.append(conn)
+
+    def _authenticate(self, conn):
+        # First line from the follower must be {"type": "auth", "token": <lease token>}
+        data = b""
+        try:
+            while not data.endswith(b"\n") and len(data) < 1024:
+                chunk = conn.recv(1024 - len(data))
+                if not chunk:
+                    return False
+                data += chunk
+            message = json.loads(data)
+        except (OSError, ValueError):
+            return False
+        token = message.get("token") if isinstance(message, dict) else None
+        return isinstance(token, str) and hmac.compare_digest(token, self.token)
+
+    def broadcast(self, message, retain=None):
+        data = encode(message)
+        with self.lock:
+            if retain is not None:
+                self.retained[retain] = message
+            for conn in list(self.clients):
+                try:
+                    conn.sendall(data)
+                except OSError:
+                    # Slow or gone follower: it reconnects and gets the retained state
+                    self.clients.remove(conn)
+                    conn.close()
+
+    def set_hello(self, hello):
+        with self.lock:
+            self.hello = hello
+
+    def follower_count(self):
+        with self.lock:
+            return len(self.clients)
+
+    def close(self):
+        self.closed = True
+        self.listener.close()
+        with self.lock:
+            for conn in self.clients:
+                conn.close()
+            self.clients = []
+            self.retained = {}
+
+class EventClient(threading.Thread):
+    """Follower side of the feed: reads messages from the leader until the connection drops or close() is called."""
+
+    def __init__(self, endpoint, token, on_event, connect_timeout=3.0):
+        super().__init__(daemon=True, name="CoordinationClient")
+        self.endpoint = tuple(endpoint)
+        self.token = token
+        self.on_event = on_event
+        self.connect_timeout = connect_timeout
+        self.sock = None
+        self.leader = None  # node named in the server's hello
+        self.closed = False
+
+    def run(self):
+        try:
+            self.sock = socket.create_connection(self.endpoint, timeout=self.connect_timeout)
+            self.sock.sendall(encode({"type": "auth", "token": self.token or ""}))
+            self.sock.settimeout(None)
+            with self.sock.makefile("r", encoding="utf-8") as stream:
+                for line in stream:
+                    if self.closed:
+                        break
+                    message = json.loads(line)
+                    if not isinstance(message, dict):
+                        continue
+                    if message.get("type") == "hello":
+                        self.leader = message.get("node")
+                    elif self.on_event:
+                        self.on_event(message)
+        except (OSError, ValueError):
+            pass
+        finally:
+            self.closed = True
+
+    def close(self):
+        self.closed = True
+        if self.sock:
+            try:
+                self.sock.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                pass
+            self.sock.close()
+
+def encode(message):
+    return (json.dumps(message) + "\n").encode("utf-8")
+
+# === Coordinator ===
+class PollerCoordinator(threading.Thread):
+    """
+    Elects one poller per `group` and relays its events.
+
+    on_role_change:  called with (is_leader, lease) from the coordinator thread.
+    on_event:        called with each message received from the leader (followers only).
+    on_message:      called with a log line on elections and failovers.
+    """
+
+    def __init__(self, group, coord_dir, node_id=None, ttl=DEFAULT_TTL, host=None, port=0,
+                 on_role_change=None, on_event=None, on_message=None):
+        super().__init__(daemon=True, name=f"PollerCoordinator-{group}")
+        self.group = group
+        self.node_id = node_id or node_identity()
+        self.ttl = ttl
+        self.heartbeat = ttl / 3
+        self.settle = min(1.0, ttl / 10)  # wait before reading back a takeover
+        self.host = host or advertise_host()
+        self.port = port
+        self.on_role_change = on_role_change
+        self.on_event = on_event
+        self.on_message = on_message
+        self.lease = LeaseFile(os.path.join(coord_dir, f"{group}.lease"))
+        self.is_leader = False
+        self.current = None           # last lease read
+        self.server = None
+        self.client = None
+        self.leader_node = None       # poller this instance follows
+        self.elections = 0
+        self._observed = None         # (node, term, beat) of the leader's lease
+        self._observed_at = 0.0       # monotonic time it last changed
+        self._renewed_at = 0.0
+        self._stop_event = threading.Event()
+        self._tick_lock = threading.Lock()  # stop() waits for a running tick so it can't rewrite a removed lease
+
+    def run(self):
+        while not self._stop_event.is_set():
+            self.tick()
+            self._stop_event.wait(self.heartbeat)
+
+    def tick(self):
+        with self._tick_lock:
+            if not self._stop_event.is_set():
+                self._tick()
+
+    def _tick(self):
+        try:
+            current = self.lease.read()
+        except ValueError:
+            return  # Being rewritten; look again next heartbeat
+        except OSError as e:
+            # Share unreachable: a leader that can't renew must stop polling before followers take over
+            if self.is_leader and time.monotonic() - self._renewed_at > self.ttl - self.heartbeat:
+                self._message(f"⚠️ Lease share unreachable ({e}); stepping down")
+                self._set_role(False, None)
+            return
+        self.current = current
+
+        if self.is_leader:
+            if current is not None and current["node"] != self.node_id:
+                self._message(f"🔀 {current['node']} took over polling")
+                self._set_role(False, current)
+                self._follow(current)
+            else:
+                self._renew(current)
+        elif current is None or self._is_stale(current):
+            self._try_acquire(current)
+        else:
+            self._follow(current)
+
+    # --- leader side ---
+    def _try_acquire(self, previous):
+        if self.server is None:
+            # Listen only on the address written in the lease, never on every interface
+            self.server = EventServer(None, secrets.token_hex(16), self.host, port=self.port)
+            self.server.start()
+        lease = {
+            "node": self.node_id,
+            "endpoint": [self.host, self.server.port],
+            "token": self.server.token,
+            "term": (previous or {}).get("term", 0) + 1,
+            "beat": 0,
+            "ttl": self.ttl,
+            "since": time.time(),
+        }
+        self.server.set_hello({"type": "hello", "node": self.node_id, "term": lease["term"]})
+        try:
+            if previous is None:
+                if not self.lease.create(lease):
+                    return
+            else:
+                self.lease.write(lease)
+            time.sleep(self.settle)
+            # Last writer wins: only the instance whose lease survived the settle period polls
+            if (self.lease.read() or {}).get("node") != self.node_id:
+                return
+        except (OSError, ValueError):
+            return
+        self.elections += 1
+        self._renewed_at = time.monotonic()
+        self.current = lease
+        if previous is not None:
+            self._message(f"👑 Took over polling from {previous['node']} (term {lease['term']})")
+        else:
+            self._message(f"👑 Elected poller for '{self.group}' (term {lease['term']})")
+        self._close_client()
+        self._set_role(True, lease)
+
+    def _renew(self, current):
+        lease = dict(current or self.current)
+        lease["beat"] = lease.get("beat", 0) + 1
+        try:
+            self.lease.write(lease)
+        except OSError:
+            if time.monotonic() - self._renewed_at > self.ttl - self.heartbeat:
+                self._message("⚠️ Could not renew the poller lease; stepping down")
+                self._set_role(False, None)
+            return
+        self.current = lease
+        self._renewed_at = time.monotonic()
+
+    def publish(self, message, retain=None):
+        """Send a JSON-serialisable message to every follower. No-op unless this instance is the poller."""
+        if self.is_leader and self.server:
+            self.server.broadcast(message, retain=retain)
+
+    # --- follower side ---
+    def _is_stale(self, lease):
+        observed = (lease["node"], lease.get("term"), lease.get("beat"))
+        now = time.monotonic()
+        if observed != self._observed:
+            self._observed = observed
+            self._observed_at = now
+            return False
+        return now - self._observed_at > self.ttl
+
+    def _follow(self, lease):
+        if self.client and not self.client.closed and self.client.endpoint == tuple(lease["endpoint"]):
+            return
+        self._close_client()
+        self.client = EventClient(lease["endpoint"], lease.get("token"), self.on_event)
+        self.client.start()
+        if self.leader_node != lease["node"]:
+            self.leader_node = lease["node"]
+            self._message(f"🛰️ Following poller {lease['node']}")
+
+    def _close_client(self):
+        if self.client:
+            self.client.close()
+            self.client = None
+
+    # --- shared ---
+    def _set_role(self, is_leader, lease):
+        if is_leader == self.is_leader:
+            return
+        self.is_leader = is_leader
+        if not is_leader and self.server:
+            # Drop followers so they re-read the lease and find the new poller
+            self.server.close()
+            self.server = None
+        if self.on_role_change:
+            self.on_role_change(is_leader, lease)
+
+    def _message(self, text):
+        if self.on_message:
+            self.on_message(text)
+
+    def status(self):
+        """One-line role description for the GUI, e.g. 'poller (2 followers)' or 'following HOST:1234'."""
+        if self.is_leader:
+            followers = self.server.follower_count() if self.server else 0
+            return f"poller ({followers} follower{'s' if followers != 1 else ''})"
+        if self.current:
+            return f"following {self.current['node']}"
+        return "electing..."
+
+    def stop(self):
+        self._stop_event.set()
+        with self._tick_lock:
+            # No tick runs from here on, so the lease stays removed and followers take over at once
+            self._close_client()
+            if self.is_leader:
+                self.lease.remove_if_owner(self.node_id)
+                self._set_role(False, None)
+            if self.server:
+                self.server.close()
+                self.server = None
+
+def open_coordinator(group, coord_dir=None, **kwargs):
+    """Create a PollerCoordinator, or return None when coordination is off (no L1_COORD_DIR) or the folder is unusable."""
+    coord_dir = coord_dir or os.environ.get("L1_COORD_DIR")
+    if not coord_dir:
+        return None
+    try:
+        os.makedirs(coord_dir, exist_ok=True)
+    except OSError:
+        return None
+    if "ttl" not in kwargs and os.environ.get("L1_COORD_TTL"):
+        kwargs["ttl"] = float(os.environ["L1_COORD_TTL"])
+    if "port" not in kwargs and os.environ.get("L1_COORD_PORT"):
+        kwargs["port"] = int(os.environ["L1_COORD_PORT"])
+    return PollerCoordinator(group, coord_dir, **kwargs)
@@ -0,0 +1,117 @@
+"""
+Append-only decision/event history shared by the Email Categorizer and
+SupportCompanion.
+
+Rows are queued by the app threads and written in batches by one background
+writer thread, so recording never blocks a poll loop. The SQLite layout keeps
+an epoch-hour bucket and per-column indexes so history_report.py can answer
+per-category, per-hour, per-rule and latency questions over months of data
+without scanning the whole table.
+"""
+import os
+import queue
+import sqlite3
+import threading
+import time
+
+DEFAULT_DB_PATH = os.path.join(os.path.expanduser("~"), "l1_decision_history.db")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS decisions (
+    id              INTEGER PRIMARY KEY,
+    ts              REAL    NOT NULL,   -- epoch seconds
+    hour            INTEGER NOT NULL,   -- epoch hour bucket, ts // 3600
+    app             TEXT    NOT NULL,   -- 'categorizer' / 'support_companion'
+    kind            TEXT    NOT NULL,   -- categorized, inherited, skipped, excluded, unread, alert, queue_wait, received_wait
+    category        TEXT,
+    rule            TEXT,
+    source          TEXT,               -- email / whatsapp / ...; priority class for queue_wait/received_wait
+    subject         TEXT,
+    conversation_id TEXT,
+    latency_ms      REAL                -- received -> decision, detection -> alarm, or time queued
+);
+CREATE INDEX IF NOT EXISTS idx_decisions_ts ON decisions (ts);
+CREATE INDEX IF NOT EXISTS idx_decisions_kind_hour_category ON decisions (kind, hour, category);
+CREATE INDEX IF NOT EXISTS idx_decisions_kind_hour_rule ON decisions (kind, hour, rule);
+-- Covering index: latency percentiles walk it in latency order without sorting or touching the table
+CREATE INDEX IF NOT EXISTS idx_decisions_latency ON decisions (kind, app, source, latency_ms, ts);
+"""
+
+COLUMNS = ("ts", "hour", "app", "kind", "category", "rule", "source", "subject", "conversation_id", "latency_ms")
+
+def connect(path=DEFAULT_DB_PATH):
+    conn = sqlite3.connect(path, check_same_thread=False)
+    conn.execute("PRAGMA journal_mode=WAL")     # readers (reports) never block the writer
+    conn.execute("PRAGMA synchronous=NORMAL")
+    conn.executescript(SCHEMA)
+    return conn
+
+class DecisionStore:
+    """
+    Batched, off-the-hot-path writer.
+    record() only enqueues; the writer thread commits every `flush_interval`
+    seconds or `batch_size` rows, whichever comes first.
+    """
+
+    def __init__(self, app, path=DEFAULT_DB_PATH, batch_size=500, flush_interval=1.0, max_pending=100000):
+        self.app = app
+        self.path = path
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.written = 0
+        self.dropped = 0
+        self._queue = queue.Queue(maxsize=max_pending)
+        self._stop = threading.Event()
+        self._writer = threading.Thread(target=self._run, name="DecisionStoreWriter", daemon=True)
+        self._writer.start()
+
+    def record(self, kind, category=None, rule=None, source=None, subject=None,
+               conversation_id=None, latency_ms=None, ts=None):
+        ts = time.time() if ts is None else ts
+        row = (ts, int(ts // 3600), self.app, kind, category, rule, source, subject, conversation_id, latency_ms)
+        try:
+            self._queue.put_nowait(row)
+        except queue.Full:
+            self.dropped += 1  # Never stall a poll loop because the disk is slow
+
+    def _take_batch(self):
+        batch = []
+        deadline = time.monotonic() + self.flush_interval
+        while len(batch) < self.batch_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(self._queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self):
+        conn = connect(self.path)
+        try:
+            while not (self._stop.is_set() and self._queue.empty()):
+                batch = self._take_batch()
+                if batch:
+                    with conn:
+                        conn.executemany(
+                            f"INSERT INTO decisions ({', '.join(COLUMNS)}) VALUES ({', '.join('?' * len(COLUMNS))})",
+                            batch,
+                        )
+                    self.written += len(batch)
+        finally:
+            conn.close()
+
+    def close(self, timeout=5.0):
+        """Flush what is queued and stop the writer thread."""
+        self._stop.set()
+        self._writer.join(timeout)
+
+def open_store(app, path=None):
+    """Create a DecisionStore, or return None if the database can't be opened."""
+    path = path or os.environ.get("L1_DECISION_DB", DEFAULT_DB_PATH)
+    try:
+        connect(path).close()
+    except sqlite3.Error:
+        return None
+    return DecisionStore(app, path)
@@ -0,0 +1,122 @@
+"""
+Shift reports over the decision history database.
+
+    python history_report.py categories --since 30d
+    python history_report.py hourly --since 30d --kind categorized
+    python history_report.py rules --since 7d
+    python history_report.py latency --since 30d
+"""
+import argparse
+import os
+import re
+import sqlite3
+import time
+
+from decision_store import DEFAULT_DB_PATH, connect
+
+def parse_since(value):
+    """'30d', '12h', '90m' -> epoch seconds that many units ago."""
+    match = re.fullmatch(r"(\d+)([dhm])", value)
+    if not match:
+        raise argparse.ArgumentTypeError("use e.g. 30d, 12h or 90m")
+    amount, unit = int(match.group(1)), match.group(2)
+    return time.time() - amount * {"d": 86400, "h": 3600, "m": 60}[unit]
+
+def per_category(conn, since, kind):
+    return conn.execute(
+        "SELECT COALESCE(category, '-'), COUNT(*) FROM decisions "
+        "WHERE kind = ? AND hour >= ? GROUP BY category ORDER BY COUNT(*) DESC",
+        (kind, int(since // 3600)),
+    ).fetchall()
+
+def per_hour_of_day(conn, since, kind):
+    """Counts per local hour of day (00-23) and category, summed over the period."""
+    rows = conn.execute(
+        "SELECT hour, COALESCE(category, '-'), COUNT(*) FROM decisions "
+        "WHERE kind = ? AND hour >= ? GROUP BY hour, category",
+        (kind, int(since // 3600)),
+    ).fetchall()
+    # Aggregate epoch-hour buckets into local hour of day in Python: a few
+    # thousand rows at most, and it keeps the index-only GROUP BY above
+    table = {}
+    for hour, category, count in rows:
+        hour_of_day = time.localtime(hour * 3600).tm_hour
+        table[(hour_of_day, category)] = table.get((hour_of_day, category), 0) + count
+    return sorted((h, c, n) for (h, c), n in table.items())
+
+def per_rule(conn, since, kind):
+    return conn.execute(
+        "SELECT COALESCE(rule, '-'), COUNT(*) FROM decisions "
+        "WHERE kind = ? AND hour >= ? GROUP BY rule ORDER BY COUNT(*) DESC",
+        (kind, int(since // 3600)),
+    ).fetchall()
+
+def latency(conn, since):
+    """
+    Count, mean, p50, p95 and max latency per app/kind/source for rows that recorded one.
+    Walks the latency index of each group up to three times and checks `since` per row,
+    so the cost follows the rows kept, not the window (about 1 s on 2M rows).
+    """
+    where = "kind IN ('alert', 'categorized', 'inherited', 'queue_wait', 'received_wait') AND ts >= ? AND latency_ms IS NOT NULL"
+    groups = conn.execute(
+        f"SELECT app, kind, source, COUNT(*), AVG(latency_ms), MAX(latency_ms) FROM decisions "
+        f"WHERE {where} GROUP BY app, kind, source",
+        (since,),
+    ).fetchall()
+    results = []
+    for app, kind, source, n, mean, maximum in groups:
+        percentiles = []
+        for q in (0.5, 0.95):
+            # Walks idx_decisions_latency in latency order; only one value per percentile comes back
+            (value,) = conn.execute(
+                f"SELECT latency_ms FROM decisions WHERE {where} AND app = ? AND kind = ? AND source IS ? "
+                f"ORDER BY latency_ms LIMIT 1 OFFSET ?",
+                (since, app, kind, source, min(n - 1, int(n * q))),
+            ).fetchone()
+            percentiles.append(value)
+        results.append((app, kind, source or "-", n, mean, percentiles[0], percentiles[1], maximum))
+    return results
+
+def main():
+    parser = argparse.ArgumentParser(description="Query the L1 decision history.")
+    parser.add_argument("report", choices=["categories", "hourly", "rules", "latency"])
+    parser.add_argument("--since", type=parse_since, default=parse_since("30d"))
+    parser.add_argument("--kind", default="categorized", help="decision kind for categories/hourly/rules")
+    parser.add_argument("--db", default=os.environ.get("L1_DECISION_DB", DEFAULT_DB_PATH))
+    args = parser.parse_args()
+
+    if not os.path.exists(args.db):
+        raise SystemExit(f"❌ No history database at {args.db}")
+    conn = connect(args.db)
+
+    start = time.perf_counter()
+    try:
+        if args.report == "categories":
+            rows = per_category(conn, args.since, args.kind)
+            header = f"{'category':<20} {'count':>8}"
+            lines = [f"{c:<20} {n:>8}" for c, n in rows]
+        elif args.report == "hourly":
+            rows = per_hour_of_day(conn, args.since, args.kind)
+            header = f"{'hour':<6} {'category':<20} {'count':>8}"
+            lines = [f"{h:02d}:00  {c:<20} {n:>8}" for h, c, n in rows]
+        elif args.report == "rules":
+            rows = per_rule(conn, args.since, args.kind)
+            header = f"{'rule':<24} {'count':>8}"
+            lines = [f"{r:<24} {n:>8}" for r, n in rows]
+        else:
+            rows = latency(conn, args.since)
+            header = f"{'app':<18} {'kind':<12} {'source':<10} {'n':>7} {'mean ms':>9} {'p50':>9} {'p95':>9} {'max':>9}"
+            lines = [f"{a:<18} {k:<12} {s:<10} {n:>7} {m:>9.0f} {p50:>9.0f} {p95:>9.0f} {mx:>9.0f}"
+                     for a, k, s, n, m, p50, p95, mx in rows]
+    except sqlite3.Error as e:
+        raise SystemExit(f"❌ Query failed: {e}")
+    finally:
+        conn.close()
+    elapsed_ms = (time.perf_counter() - start) * 1000
+
+    print(header)
+    print("\n".join(lines) if lines else "(no rows)")
+    print(f"-- {len(lines)} rows in {elapsed_ms:.1f} ms")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,224 @@
+"""
+Runtime resource watchdog shared by the Email Categorizer and SupportCompanion.
+
+Samples process RSS, child-process RSS (Chrome), live thread count, open
+handles and live COM interface objects on a background thread, keeps a
+bounded history for trend lines, and runs registered mitigations (clear
+caches, trim logs, restart the browser, re-create the COM session) when a
+limit is crossed. tracemalloc heap snapshots are taken only on demand.
+"""
+import collections
+import ctypes
+import os
+import sys
+import threading
+import time
+import tracemalloc
+
+try:
+    import psutil
+except ImportError:
+    psutil = None
+
+# === Probes ===
+def process_rss_mb():
+    if psutil:
+        return psutil.Process().memory_info().rss / 1e6
+    if sys.platform == "win32":
+        class PROCESS_MEMORY_COUNTERS(ctypes.Structure):
+            _fields_ = [
+                ("cb", ctypes.c_ulong), ("PageFaultCount", ctypes.c_ulong),
+                ("PeakWorkingSetSize", ctypes.c_size_t), ("WorkingSetSize", ctypes.c_size_t),
+                ("QuotaPeakPagedPoolUsage", ctypes.c_size_t), ("QuotaPagedPoolUsage", ctypes.c_size_t),
+                ("QuotaPeakNonPagedPoolUsage", ctypes.c_size_t), ("QuotaNonPagedPoolUsage", ctypes.c_size_t),
+                ("PagefileUsage", ctypes.c_size_t), ("PeakPagefileUsage", ctypes.c_size_t),
+            ]
+        counters = PROCESS_MEMORY_COUNTERS()
+        counters.cb = ctypes.sizeof(counters)
+        handle = ctypes.windll.kernel32.GetCurrentProcess()
+        if ctypes.windll.psapi.GetProcessMemoryInfo(handle, ctypes.byref(counters), counters.cb):
+            return counters.WorkingSetSize / 1e6
+        return None
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 1e6
+    except (OSError, ValueError):
+        return None
+
+def children_rss_mb():
+    """RSS of child processes (chromedriver + Chrome). Needs psutil."""
+    if not psutil:
+        return None
+    total = 0
+    for child in psutil.Process().children(recursive=True):
+        try:
+            total += child.memory_info().rss
+        except (psutil.NoSuchProcess, psutil.AccessDenied):
+            continue
+    return total / 1e6
+
+def process_handles():
+    if psutil:
+        p = psutil.Process()
+        return p.num_handles() if hasattr(p, "num_handles") else p.num_fds()
+    if sys.platform == "win32":
+        count = ctypes.c_ulong()
+        handle = ctypes.windll.kernel32.GetCurrentProcess()
+        if ctypes.windll.kernel32.GetProcessHandleCount(handle, ctypes.byref(count)):
+            return count.value
+        return None
+    try:
+        return len(os.listdir("/proc/self/fd"))
+    except OSError:
+        return None
+
+def com_objects():
+    """Live COM interface proxies held by this process (pywin32 only)."""
+    pythoncom = sys.modules.get("pythoncom")
+    counter = getattr(pythoncom, "_GetInterfaceCount", None)
+    return counter() if counter else None
+
+METRICS = ("rss_mb", "children_rss_mb", "threads", "handles", "com_objects")
+
+def take_sample():
+    return {
+        "ts": time.time(),
+        "rss_mb": process_rss_mb(),
+        "children_rss_mb": children_rss_mb(),
+        "threads": threading.active_count(),
+        "handles": process_handles(),
+        "com_objects": com_objects(),
+    }
+
+# === Watchdog ===
+class ResourceWatchdog(threading.Thread):
+    """
+    Background sampler with limits and mitigations.
+
+    limits:      {"rss_mb": 400, "threads": 40, ...}; a metric above its limit
+                 triggers that metric's mitigations, at most once per `cooldown`.
+    on_sample:   called with (sample, watchdog) from the watchdog thread.
+    on_message:  called with a log line whenever a mitigation runs.
+    """
+
+    def __init__(self, interval=60, history=240, limits=None, cooldown=600, on_sample=None, on_message=None):
+        super().__init__(daemon=True, name="ResourceWatchdog")
+        self.interval = interval
+        self.limits = dict(limits or {})
+        self.cooldown = cooldown
+        self.on_sample = on_sample
+        self.on_message = on_message
+        self.samples = collections.deque(maxlen=history)
+        self.mitigations = collections.defaultdict(list)
+        self.last_mitigated = {}
+        self.mitigation_count = 0
+        self._heap_baseline = None
+        self._stop_event = threading.Event()
+        self._lock = threading.Lock()
+
+    def register_mitigation(self, metric, name, action):
+        if metric not in METRICS:
+            raise ValueError(f"Unknown metric: {metric}")
+        self.mitigations[metric].append((name, action))
+
+    def run(self):
+        while not self._stop_event.is_set():
+            self.sample_now()
+            self._stop_event.wait(self.interval)
+
+    def sample_now(self):
+        sample = take_sample()
+        with self._lock:
+            self.samples.append(sample)
+        self._check_limits(sample)
+        if self.on_sample:
+            self.on_sample(sample, self)
+        return sample
+
+    def _check_limits(self, sample):
+        now = time.monotonic()
+        for metric, limit in self.limits.items():
+            value = sample.get(metric)
+            if value is None or value <= limit:
+                continue
+            if now - self.last_mitigated.get(metric, -self.cooldown) < self.cooldown:
+                continue
+            self.last_mitigated[metric] = now
+            for name, action in self.mitigations.get(metric, []):
+                try:
+                    action()
+                    self.mitigation_count += 1
+                    self._message(f"🩺 {metric}={value:,.0f} over limit {limit:,.0f}: ran '{name}'")
+                except Exception as e:
+                    self._message(f"⚠️ Mitigation '{name}' failed: {e}")
+
+    def _message(self, text):
+        if self.on_message:
+            self.on_message(text)
+
+    def latest(self):
+        with self._lock:
+            return self.samples[-1] if self.samples else None
+
+    def trend(self, metric, window_s=3600):
+        """Least-squares slope of `metric` per hour over the last `window_s` seconds, or None."""
+        with self._lock:
+            points = [(s["ts"], s[metric]) for s in self.samples if s.get(metric) is not None]
+        if not points:
+            return None
+        cutoff = points[-1][0] - window_s
+        points = [(t, v) for t, v in points if t >= cutoff]
+        if len(points) < 2:
+            return None
+        mean_t = sum(t for t, _ in points) / len(points)
+        mean_v = sum(v for _, v in points) / len(points)
+        denominator = sum((t - mean_t) ** 2 for t, _ in points)
+        if not denominator:
+            return None
+        slope = sum((t - mean_t) * (v - mean_v) for t, v in points) / denominator
+        return slope * 3600
+
+    def summary(self):
+        """One-line status for the GUI / metrics output, e.g. 'RSS 85MB (+3.2/h) · threads 9 · COM 42'."""
+        sample = self.latest()
+        if sample is None:
+            return "no samples yet"
+        parts = []
+        for metric, label, unit in (
+            ("rss_mb", "RSS", "MB"),
+            ("children_rss_mb", "Chrome", "MB"),
+            ("threads", "threads", ""),
+            ("handles", "handles", ""),
+            ("com_objects", "COM", ""),
+        ):
+            value = sample.get(metric)
+            if value is None:
+                continue
+            slope = self.trend(metric)
+            trend = f" ({slope:+.1f}/h)" if slope is not None else ""
+            parts.append(f"{label} {value:,.0f}{unit}{trend}")
+        return " · ".join(parts)
+
+    def snapshot_heap(self, top=10):
+        """
+        On-demand tracemalloc snapshot. Tracing starts on the first call, so
+        that call only sees allocations made since; later calls return the
+        growth since the previous snapshot.
+        """
+        if not tracemalloc.is_tracing():
+            tracemalloc.start(10)
+        snapshot = tracemalloc.take_snapshot().filter_traces((
+            tracemalloc.Filter(False, tracemalloc.__file__),
+            tracemalloc.Filter(False, "<frozen importlib._bootstrap*>"),
+        ))
+        if self._heap_baseline is None:
+            stats = snapshot.statistics("lineno")[:top]
+            lines = [f"{s.traceback[0].filename}:{s.traceback[0].lineno} {s.size / 1024:,.0f} KiB" for s in stats]
+        else:
+            stats = snapshot.compare_to(self._heap_baseline, "lineno")[:top]
+            lines = [f"{s.traceback[0].filename}:{s.traceback[0].lineno} {s.size_diff / 1024:+,.0f} KiB" for s in stats]
+        self._heap_baseline = snapshot
+        return lines
+
+    def stop(self):
+        self._stop_event.set()
@@ -1,5 +1,9 @@
 import win32com.client
 import pythoncom
+import asyncio
+import concurrent.futures
+import functools
+import queue
 import time
 import threading
 import tkinter as tk
@@ -17,14 +21,58 @@ CHECK_INTERVAL = 10
 SHARED_MAILBOX = "shared_mailbox@example.com"
 ALARM_FILENAME = "alarm.wav"  # or .mp3
 CHROMEDRIVER_PATH = "chromedriver.exe"
+WA_CHECK_INTERVAL = 5
+WA_LOGIN_WAIT = 15
+UI_PUMP_INTERVAL_MS = 100  # Tk tick that applies log/status updates from the monitor tasks
+UI_PUMP_BATCH = 200
+SHUTDOWN_TIMEOUT = 10      # seconds Exit waits for Chrome to quit and Outlook to be released
 
 # === GLOBAL FLAGS ===
 monitoring = False
-monitor_thread = None
 alarm_playing = False
 wa_monitoring_enabled = True
 email_monitoring_enabled = True
 
+# === Monitor Runtime ===
+# The email, WhatsApp and alarm loops are tasks on one asyncio loop thread. Blocking
+# Outlook and Chrome calls run on one dedicated thread each (COM objects must stay on
+# the thread that created them); waits are asyncio sleeps, so Stop cancels at once.
+loop = asyncio.new_event_loop()
+com_executor = concurrent.futures.ThreadPoolExecutor(
+    max_workers=1, thread_name_prefix="outlook", initializer=pythoncom.CoInitialize)
+browser_executor = concurrent.futures.ThreadPoolExecutor(max_workers=1, thread_name_prefix="chrome")
+com_session = {}      # Outlook proxies, only touched on the COM thread
+browser_session = {}  # WebDriver, only touched on the Chrome thread
+ui_queue = queue.Queue()  # (function, args) applied on the Tk thread by pump_ui
+monitor_futures = []      # one per running monitor task, cancelled by Stop
+alarm_task = None         # only touched on the loop thread
+
+def ui(fn, *args):
+    # Monitor tasks never touch Tk widgets directly
+    ui_queue.put((fn, args))
+
+async def blocking(executor, fn, *args):
+    return await loop.run_in_executor(executor, functools.partial(fn, *args))
+
+async def cancel_all():
+    # Exit: cancel everything and wait until Chrome has quit and Outlook is released
+    tasks = [task for task in asyncio.all_tasks() if task is not asyncio.current_task()]
+    for task in tasks:
+        task.cancel()
+    if tasks:
+        await asyncio.wait(tasks, timeout=SHUTDOWN_TIMEOUT)
+
+def start_task(coro):
+    monitor_futures.append(asyncio.run_coroutine_threadsafe(coro, loop))
+
+def cancel_monitors():
+    # Cancelling the futures cancels the tasks at their current await; cleanup runs in their finally
+    for future in monitor_futures:
+        future.cancel()
+    monitor_futures.clear()
+
+threading.Thread(target=loop.run_forever, daemon=True, name="monitor-loop").start()
+
 # === Prevent Sleep ===
 ES_CONTINUOUS = 0x80000000
 ES_SYSTEM_REQUIRED = 0x00000001
@@ -41,115 +89,141 @@ def allow_sleep():
 base_path = getattr(sys, '_MEIPASS', os.path.abspath("."))
 ALARM_FILE = os.path.join(base_path, ALARM_FILENAME)
 
-def play_alarm_loop():
+def play_alarm_once():
+    pygame.mixer.init()
+    pygame.mixer.music.load(ALARM_FILE)
+    pygame.mixer.music.play()
+
+async def play_alarm_loop():
     try:
-        pygame.mixer.init()
         while alarm_playing:
-            pygame.mixer.music.load(ALARM_FILE)
-            pygame.mixer.music.play()
+            await blocking(None, play_alarm_once)
             while pygame.mixer.music.get_busy() and alarm_playing:
-                time.sleep(1)
+                await asyncio.sleep(1)
     except Exception as e:
-        append_log(f"❌ Alarm error: {e}")
+        ui(append_log, f"❌ Alarm error: {e}")
+
+def ring_alarm():
+    # Runs on the loop thread, so checking and setting the flag cannot race
+    global alarm_playing, alarm_task
+    if not alarm_playing:
+        alarm_playing = True
+        if alarm_task:
+            alarm_task.cancel()  # A loop from before the last Stop may still be in its 1s wait
+        alarm_task = loop.create_task(play_alarm_loop())
 
 # === Outlook Monitoring ===
-def monitor_emails():
-    global monitoring, alarm_playing
-    pythoncom.CoInitialize()
+def connect_inbox():
+    outlook = win32com.client.Dispatch("Outlook.Application")
+    namespace = outlook.GetNamespace("MAPI")
+
+    for account in namespace.Folders:
+        if account.Name.lower() == SHARED_MAILBOX.lower():
+            com_session["inbox"] = account.Folders["Inbox"]
+            return True
+    return False
+
+def count_unread_emails():
+    unread_items = com_session["inbox"].Items.Restrict("[Unread]=true")
+    return unread_items.Count
+
+def release_inbox():
+    com_session.clear()
+
+async def monitor_emails():
+    global monitoring
 
     try:
-        outlook = win32com.client.Dispatch("Outlook.Application")
-        namespace = outlook.GetNamespace("MAPI")
-
-        inbox = None
-        for account in namespace.Folders:
-            if account.Name.lower() == SHARED_MAILBOX.lower():
-                inbox = account.Folders["Inbox"]
-                break
-
-        if inbox is None:
-            update_status(f"❌ Could not find Inbox for '{SHARED_MAILBOX}'")
-            messagebox.showerror("Mailbox Error", f"Shared mailbox '{SHARED_MAILBOX}' not found.")
+        if not await blocking(com_executor, connect_inbox):
+            ui(update_status, f"❌ Could not find Inbox for '{SHARED_MAILBOX}'")
+            ui(messagebox.showerror, "Mailbox Error", f"Shared mailbox '{SHARED_MAILBOX}' not found.")
             monitoring = False
             return
 
-        update_status("Monitoring started...")
+        ui(update_status, "Monitoring started...")
 
         while monitoring:
             try:
                 if not email_monitoring_enabled:
-                    time.sleep(CHECK_INTERVAL)
+                    await asyncio.sleep(CHECK_INTERVAL)
                     continue
 
-                unread_items = inbox.Items.Restrict("[Unread]=true")
-                unread_count = unread_items.Count
+                unread_count = await blocking(com_executor, count_unread_emails)
 
                 log_msg = f"[{time.strftime('%H:%M:%S')}] Unread emails: {unread_count}"
-                append_log(log_msg)
-                update_status(log_msg)
+                ui(append_log, log_msg)
+                ui(update_status, log_msg)
 
-                if unread_count > 0 and not alarm_playing:
-                    alarm_playing = True
-                    threading.Thread(target=play_alarm_loop, daemon=True).start()
+                if unread_count > 0:
+                    ring_alarm()
 
             except Exception as check_err:
-                append_log(f"⚠️ Email error: {check_err}")
+                ui(append_log, f"⚠️ Email error: {check_err}")
 
-            time.sleep(CHECK_INTERVAL)
+            await asyncio.sleep(CHECK_INTERVAL)
 
     except Exception as e:
-        update_status("Monitoring stopped due to error.")
-        messagebox.showerror("Monitoring Error", f"❌ Email Monitor Error:\n{e}")
+        ui(update_status, "Monitoring stopped due to error.")
+        ui(messagebox.showerror, "Monitoring Error", f"❌ Email Monitor Error:\n{e}")
         monitoring = False
 
     finally:
-        pythoncom.CoUninitialize()
+        await blocking(com_executor, release_inbox)
 
 # === WhatsApp Monitoring ===
-def monitor_whatsapp():
-    global alarm_playing
-
+def open_whatsapp():
+    options = Options()
+    profile_path = os.path.join(os.environ["TEMP"], "wa_profile_temp")
+    options.add_argument(f"user-data-dir={profile_path}")
+    options.add_argument("--disable-dev-shm-usage")
+    options.add_argument("--no-sandbox")
+    options.add_argument("--remote-debugging-port=9222")
+    options.add_experimental_option("excludeSwitches", ["enable-logging"])
+
+    browser_session["driver"] = webdriver.Chrome(service=Service(CHROMEDRIVER_PATH), options=options)
+    browser_session["driver"].get("https://web.whatsapp.com")
+
+def count_unread_chats():
+    return len(browser_session["driver"].find_elements("xpath", "//span[contains(@aria-label, 'unread message')]"))
+
+def quit_whatsapp():
+    driver = browser_session.pop("driver", None)
+    if driver:
+        driver.quit()
+
+async def monitor_whatsapp():
     try:
-        options = Options()
-        profile_path = os.path.join(os.environ["TEMP"], "wa_profile_temp")
-        options.add_argument(f"user-data-dir={profile_path}")
-        options.add_argument("--disable-dev-shm-usage")
-        options.add_argument("--no-sandbox")
-        options.add_argument("--remote-debugging-port=9222")
-        options.add_experimental_option("excludeSwitches", ["enable-logging"])
-
-        driver = webdriver.Chrome(service=Service(CHROMEDRIVER_PATH), options=options)
-        driver.get("https://web.whatsapp.com")
+        await blocking(browser_executor, open_whatsapp)
 
-        append_log("🔗 Waiting for WhatsApp Web login...")
-        time.sleep(15)
+        ui(append_log, "🔗 Waiting for WhatsApp Web login...")
+        await asyncio.sleep(WA_LOGIN_WAIT)
 
-        append_log("✅ WhatsApp monitoring started...")
+        ui(append_log, "✅ WhatsApp monitoring started...")
 
         while monitoring:
             try:
                 if not wa_monitoring_enabled:
-                    time.sleep(5)
+                    await asyncio.sleep(WA_CHECK_INTERVAL)
                     continue
 
-                unread = driver.find_elements("xpath", "//span[contains(@aria-label, 'unread message')]")
-                append_log(f"🧪 Found {len(unread)} unread badge(s) on WhatsApp.")
+                unread = await blocking(browser_executor, count_unread_chats)
+                ui(append_log, f"🧪 Found {unread} unread badge(s) on WhatsApp.")
 
                 if unread:
-                    append_log("📲 WhatsApp: Unread message(s) detected!")
-
-                    if not alarm_playing:
-                        alarm_playing = True
-                        threading.Thread(target=play_alarm_loop, daemon=True).start()
-
-                time.sleep(5)
+                    ui(append_log, "📲 WhatsApp: Unread message(s) detected!")
+                    ring_alarm()
 
             except Exception as inner:
-                append_log(f"⚠️ WhatsApp error: {inner}")
-                time.sleep(5)
+                ui(append_log, f"⚠️ WhatsApp error: {inner}")
+
+            await asyncio.sleep(WA_CHECK_INTERVAL)
 
     except Exception as e:
-        append_log(f"❌ WhatsApp Monitor Error: {e}")
+        ui(append_log, f"❌ WhatsApp Monitor Error: {e}")
+
+    finally:
+        # Queued on the Chrome thread, so a quick Start after Stop opens the browser only after this one quit
+        await blocking(browser_executor, quit_whatsapp)
 
 # === GUI Functions ===
 def update_status(msg):
@@ -159,18 +233,28 @@ def append_log(msg):
     log_box.insert(tk.END, msg + "\n")
     log_box.see(tk.END)
 
+def pump_ui():
+    # Runs on the Tk thread: the only place monitor tasks reach widgets
+    for _ in range(UI_PUMP_BATCH):
+        try:
+            fn, args = ui_queue.get_nowait()
+        except queue.Empty:
+            break
+        fn(*args)
+    root.after(UI_PUMP_INTERVAL_MS, pump_ui)
+
 def start_monitoring():
     global monitoring
     if not monitoring:
         monitoring = True
         prevent_sleep()
-        append_log(">> Starting monitor thread...")
+        append_log(">> Starting monitor tasks...")
 
         if email_toggle_var.get():
-            threading.Thread(target=monitor_emails, daemon=True).start()
+            start_task(monitor_emails())
 
         if whatsapp_toggle_var.get():
-            threading.Thread(target=monitor_whatsapp, daemon=True).start()
+            start_task(monitor_whatsapp())
 
     else:
         messagebox.showinfo("Info", "Monitoring already running.")
@@ -179,11 +263,24 @@ def stop_monitoring():
     global monitoring, alarm_playing
     monitoring = False
     alarm_playing = False
+    cancel_monitors()  # Wakes every sleeping loop now instead of after its interval
     allow_sleep()
     pygame.mixer.music.stop()
     update_status("Monitoring stopped.")
     append_log(">> Monitoring stopped.")
 
+def exit_app():
+    global monitoring, alarm_playing
+    monitoring = False
+    alarm_playing = False
+    try:
+        asyncio.run_coroutine_threadsafe(cancel_all(), loop).result(SHUTDOWN_TIMEOUT)
+    except concurrent.futures.TimeoutError:
+        pass  # A hung Outlook/Chrome call; the daemon threads end with the process
+    com_executor.submit(pythoncom.CoUninitialize)
+    loop.call_soon_threadsafe(loop.stop)
+    root.quit()
+
 # === GUI Layout ===
 root = tk.Tk()
 root.title("SupportCompanion")
@@ -214,6 +311,8 @@ tk.Button(btn_frame, text="Stop Monitoring", width=20, command=stop_monitoring).
 log_box = tk.Text(root, height=10, width=64)
 log_box.pack(pady=10)
 
-tk.Button(root, text="Exit", width=20, command=root.quit).pack(pady=5)
+tk.Button(root, text="Exit", width=20, command=exit_app).pack(pady=5)
 
+root.protocol("WM_DELETE_WINDOW", exit_app)
+root.after(UI_PUMP_INTERVAL_MS, pump_ui)
 root.mainloop()
@@ -1,28 +1,45 @@
-import win32com.client
-import pythoncom
 import time
 import threading
 import tkinter as tk
 from tkinter import messagebox
-import pygame
 import os
 import sys
 import ctypes
-from selenium import webdriver
-from selenium.webdriver.chrome.service import Service
-from selenium.webdriver.chrome.options import Options
+# Backends (win32com, selenium, ...) are imported by the sources package only when a source is started
+import sources
+from runtime import SourceRuntime
+from event_bus import (EventBus, UnreadDetected, StatusChanged, Error, AlarmStarted, ResourceSample, RoleChanged,
+                       BLOCK, DROP_OLDEST, to_dict, from_dict)
+
+# Decision history, the resource watchdog and poller coordination are shared with the Email Categorizer
+for shared_dir in ("decision_history", "resource_watchdog", "coordination"):
+    sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", shared_dir))
+try:
+    from decision_store import open_store
+except ImportError:
+    open_store = None
+try:
+    from resource_watchdog import ResourceWatchdog
+except ImportError:
+    ResourceWatchdog = None
+try:
+    from poller_coordinator import open_coordinator
+except ImportError:
+    open_coordinator = None
 
 # === CONFIGURATION ===
-CHECK_INTERVAL = 10
-SHARED_MAILBOX = "LE-HELPDESK.PH@fpt.com"
 ALARM_FILENAME = "alarm.wav"  # or .mp3
-CHROMEDRIVER_PATH = "chromedriver.exe"
-
-# === GLOBAL FLAGS ===
-monitoring = False
-alarm_playing = False
-wa_monitoring_enabled = True
-email_monitoring_enabled = True
+UI_PUMP_INTERVAL_MS = 100     # Tk tick that drains the GUI's event queue
+UI_PUMP_BATCH = 200           # max events handled per tick so the GUI stays responsive
+WATCHDOG_INTERVAL = 60        # seconds between resource samples
+WATCHDOG_LIMITS = {
+    "rss_mb": 400,            # trim the log widget
+    "children_rss_mb": 1500,  # restart Chrome (needs psutil)
+    "com_objects": 500,       # re-create the Outlook COM session
+}
+LOG_TRIM_LINES = 500          # lines kept in the log widget after a trim
+COORDINATION_GROUP = "support_companion"
+SHARED_SOURCES = ("email",)   # with L1_COORD_DIR set, only the elected poller runs these and relays their events
 
 # === Prevent Sleep ===
 ES_CONTINUOUS = 0x80000000
@@ -42,157 +59,161 @@ ALARM_FILE = os.path.join(base_path, ALARM_FILENAME)
 
 class AlarmPlayer:
     def __init__(self):
-        pygame.mixer.init()
+        self.mixer = None  # pygame is loaded on the first alarm, not at startup
         self.alarm_playing = False
         self.lock = threading.Lock()
 
-    def play_alarm_loop(self):
+    def load_mixer(self):
+        if self.mixer is None:
+            import pygame
+            pygame.mixer.init()
+            self.mixer = pygame.mixer
+        return self.mixer
+
+    def start_alarm(self):
+        """Start the looping alarm unless it is already playing. Returns True if it started."""
         with self.lock:
             if self.alarm_playing:
-                return  # Already playing
+                return False  # Already playing
+            mixer = self.load_mixer()
+            mixer.music.load(ALARM_FILE)
+            mixer.music.play(-1)  # Loop indefinitely
             self.alarm_playing = True
-
-        try:
-            pygame.mixer.music.load(ALARM_FILE)
-            pygame.mixer.music.play(-1)  # Loop indefinitely
-            while self.alarm_playing:
-                time.sleep(1)
-            pygame.mixer.music.stop()
-        except Exception as e:
-            print(f"❌ Alarm error: {e}")
-        finally:
-            with self.lock:
-                self.alarm_playing = False
+            return True
 
     def stop_alarm(self):
         with self.lock:
             self.alarm_playing = False
-        pygame.mixer.music.stop()
+            if self.mixer:
+                self.mixer.music.stop()
 
-# === Outlook Monitoring ===
-class EmailMonitor(threading.Thread):
-    def __init__(self, alarm_player, update_status_callback, append_log_callback):
-        super().__init__(daemon=True)
+class AlarmService:
+    """Consumes UnreadDetected events and rings the alarm; a task on the SourceRuntime loop."""
+
+    def __init__(self, bus, alarm_player):
+        self.bus = bus
         self.alarm_player = alarm_player
-        self.update_status = update_status_callback
-        self.append_log = append_log_callback
-        self.monitoring = False
+        self.runtime = None  # Set by SourceRuntime.start_task
+        # Small queue: only the latest detections matter for ringing the alarm
+        self.subscription = bus.subscribe("alarm", (UnreadDetected,), maxsize=16, policy=DROP_OLDEST)
+
+    async def run(self):
+        while True:
+            event = await self.subscription.get_async()
+            if event is None:
+                break  # Subscription closed
+            if event.count <= 0:
+                continue
+            try:
+                # pygame loads the file from disk, so keep it off the loop thread
+                if await self.runtime.run_blocking(None, self.alarm_player.start_alarm):
+                    latency_ms = (time.time() - event.timestamp) * 1000
+                    self.bus.publish(AlarmStarted(source=event.source, latency_ms=latency_ms))
+            except Exception as e:
+                self.bus.publish(Error(source="alarm", message=f"❌ Alarm error: {e}"))
+
+    async def close(self):
+        self.bus.unsubscribe(self.subscription)
+
+# === Metrics ===
+class MetricsCollector(threading.Thread):
+    """Counts events per type and source; read by the GUI when monitoring stops."""
+
+    def __init__(self, bus):
+        super().__init__(daemon=True)
+        self.bus = bus
+        self.counts = {}
+        self.last_unread = {}
+        self.lock = threading.Lock()
+        # Metrics must not lose events, so publishers briefly wait instead of dropping
+        self.subscription = bus.subscribe("metrics", maxsize=10000, policy=BLOCK)
 
     def run(self):
-        pythoncom.CoInitialize()
-        try:
-            outlook = win32com.client.Dispatch("Outlook.Application")
-            namespace = outlook.GetNamespace("MAPI")
-
-            inbox = None
-            for account in namespace.Folders:
-                if account.Name.lower() == SHARED_MAILBOX.lower():
-                    inbox = account.Folders["Inbox"]
-                    break
-
-            if inbox is None:
-                self.update_status(f"❌ Could not find Inbox for '{SHARED_MAILBOX}'")
-                messagebox.showerror("Mailbox Error", f"Shared mailbox '{SHARED_MAILBOX}' not found.")
-                return
-
-            self.update_status("Email monitoring started...")
-            self.monitoring = True
-
-            while self.monitoring:
-                if not email_monitoring_enabled:
-                    time.sleep(CHECK_INTERVAL)
-                    continue
-
-                try:
-                    unread_items = inbox.Items.Restrict("[Unread]=true")
-                    unread_count = unread_items.Count
-
-                    log_msg = f"[{time.strftime('%H:%M:%S')}] Unread emails: {unread_count}"
-                    self.append_log(log_msg)
-                    self.update_status(log_msg)
+        while True:
+            event = self.subscription.get()
+            if event is None:
+                break
+            key = (type(event).__name__, event.source)
+            with self.lock:
+                self.counts[key] = self.counts.get(key, 0) + 1
+                if isinstance(event, UnreadDetected):
+                    self.last_unread[event.source] = event.count
 
-                    if unread_count > 0 and not self.alarm_player.alarm_playing:
-                        threading.Thread(target=self.alarm_player.play_alarm_loop, daemon=True).start()
+    def summary(self):
+        with self.lock:
+            parts = [f"{name}[{source}]={count}" for (name, source), count in sorted(self.counts.items())]
+        return ", ".join(parts) or "no events"
 
-                except Exception as check_err:
-                    self.append_log(f"⚠️ Email error: {check_err}")
+    def stop(self):
+        self.bus.unsubscribe(self.subscription)
 
-                time.sleep(CHECK_INTERVAL)
+# === Decision History ===
+class HistoryRecorder(threading.Thread):
+    """Writes alarms and errors to the shared decision history (batched off the bus thread)."""
 
-        except Exception as e:
-            self.update_status("Email monitoring stopped due to error.")
-            messagebox.showerror("Monitoring Error", f"❌ Email Monitor Error:\n{e}")
+    def __init__(self, bus, store):
+        super().__init__(daemon=True)
+        self.bus = bus
+        self.store = store
+        self.subscription = bus.subscribe("history", (AlarmStarted, Error), maxsize=1000, policy=DROP_OLDEST)
 
-        finally:
-            pythoncom.CoUninitialize()
+    def run(self):
+        while True:
+            event = self.subscription.get()
+            if event is None:
+                break
+            if isinstance(event, AlarmStarted):
+                self.store.record("alert", source=event.source, latency_ms=event.latency_ms, ts=event.timestamp)
+            else:
+                self.store.record("error", source=event.source, subject=event.message, ts=event.timestamp)
 
     def stop(self):
-        self.monitoring = False
+        self.bus.unsubscribe(self.subscription)
+
+# === Poller Coordination ===
+class CoordinationRelay(threading.Thread):
+    """
+    While this instance is the elected poller, forwards shared-source events to
+    the other instances; on followers, republishes the poller's events on the
+    local bus as '<source>@poller' so the alarm, metrics and GUI react to them.
+    """
 
-# === WhatsApp Monitoring ===
-class WhatsAppMonitor(threading.Thread):
-    def __init__(self, alarm_player, update_status_callback, append_log_callback):
+    def __init__(self, bus, coordinator):
         super().__init__(daemon=True)
-        self.alarm_player = alarm_player
-        self.update_status = update_status_callback
-        self.append_log = append_log_callback
-        self.monitoring = False
-        self.driver = None
+        self.bus = bus
+        self.coordinator = coordinator
+        self.subscription = bus.subscribe("coordination", (UnreadDetected, StatusChanged), maxsize=1000, policy=DROP_OLDEST)
 
     def run(self):
+        while True:
+            event = self.subscription.get()
+            if event is None:
+                break
+            if event.source in SHARED_SOURCES:
+                # The latest unread count is retained for followers that connect later
+                retain = event.source if isinstance(event, UnreadDetected) else None
+                self.coordinator.publish(to_dict(event), retain=retain)
+
+    def receive(self, data):
+        # Called on the coordinator's feed thread
         try:
-            options = Options()
-            profile_path = os.path.join(os.environ["TEMP"], "wa_profile_temp")
-            options.add_argument(f"user-data-dir={profile_path}")
-            options.add_argument("--disable-dev-shm-usage")
-            options.add_argument("--no-sandbox")
-            options.add_argument("--remote-debugging-port=9222")
-            options.add_experimental_option("excludeSwitches", ["enable-logging"])
-
-            self.driver = webdriver.Chrome(service=Service(CHROMEDRIVER_PATH), options=options)
-            self.driver.get("https://web.whatsapp.com")
-
-            self.append_log("🔗 Waiting for WhatsApp Web login...")
-            time.sleep(15)
-
-            self.update_status("WhatsApp monitoring started...")
-            self.monitoring = True
-
-            while self.monitoring:
-                if not wa_monitoring_enabled:
-                    time.sleep(5)
-                    continue
-
-                try:
-                    unread = self.driver.find_elements("xpath", "//span[contains(@aria-label, 'unread message')]")
-                    self.append_log(f"🧪 Found {len(unread)} unread badge(s) on WhatsApp.")
-
-                    if unread:
-                        self.append_log("📲 WhatsApp: Unread message(s) detected!")
-
-                        if not self.alarm_player.alarm_playing:
-                            threading.Thread(target=self.alarm_player.play_alarm_loop, daemon=True).start()
-
-                    time.sleep(5)
-
-                except Exception as inner:
-                    self.append_log(f"⚠️ WhatsApp error: {inner}")
-                    time.sleep(5)
-
-        except Exception as e:
-            self.append_log(f"❌ WhatsApp Monitor Error: {e}")
+            overrides = {"source": f"{data['source']}@poller"}
+            if data["type"] == "StatusChanged":
+                overrides["message"] = f"🛰️ {data['message']}"
+            event = from_dict(data, **overrides)
+        except (KeyError, TypeError):
+            return
+        self.bus.publish(event)
 
     def stop(self):
-        self.monitoring = False
-        if self.driver:
-            self.driver.quit()
+        self.bus.unsubscribe(self.subscription)
 
 # === GUI Functions and Layout ===
 class SupportCompanionApp:
     def __init__(self, root):
         self.root = root
         self.root.title("SupportCompanion Modular")
-        self.root.geometry("520x400")
+        self.root.geometry("520x460")
 
         self.status_var = tk.StringVar()
         self.status_var.set("Status: Not monitoring")
@@ -200,15 +221,19 @@ class SupportCompanionApp:
         self.status_label = tk.Label(root, textvariable=self.status_var, wraplength=480)
         self.status_label.pack(pady=10)
 
-        # Monitoring Toggles
-        self.email_toggle_var = tk.BooleanVar(value=True)
-        self.whatsapp_toggle_var = tk.BooleanVar(value=True)
+        self.resource_var = tk.StringVar(value="Resources: -")
+        tk.Label(root, textvariable=self.resource_var, wraplength=480, fg="gray").pack()
+
+        # Monitoring Toggles: one per source bundled in this build
+        self.source_toggle_vars = {}
 
         toggle_frame = tk.Frame(root)
         toggle_frame.pack(pady=5)
 
-        tk.Checkbutton(toggle_frame, text="Monitor Outlook", variable=self.email_toggle_var).grid(row=0, column=0, padx=10)
-        tk.Checkbutton(toggle_frame, text="Monitor WhatsApp", variable=self.whatsapp_toggle_var).grid(row=0, column=1, padx=10)
+        for column, spec in enumerate(sources.available_sources()):
+            var = tk.BooleanVar(value=spec.default_enabled)
+            self.source_toggle_vars[spec.name] = var
+            tk.Checkbutton(toggle_frame, text=spec.label, variable=var).grid(row=0, column=column, padx=10)
 
         btn_frame = tk.Frame(root)
         btn_frame.pack()
@@ -222,11 +247,137 @@ class SupportCompanionApp:
         self.log_box = tk.Text(root, height=10, width=64)
         self.log_box.pack(pady=10)
 
-        tk.Button(root, text="Exit", width=20, command=root.quit).pack(pady=5)
+        tk.Button(root, text="Heap Snapshot", width=20, command=self.heap_snapshot).pack()
+        tk.Button(root, text="Exit", width=20, command=self.exit_app).pack(pady=5)
 
+        self.bus = EventBus()
+        self.ui_events = self.bus.subscribe("ui", maxsize=1000, policy=DROP_OLDEST)
         self.alarm_player = AlarmPlayer()
-        self.email_monitor = None
-        self.whatsapp_monitor = None
+        # One loop thread for every source and the alarm; blocking backend calls go to its executor lanes
+        self.runtime = SourceRuntime()
+        self.runtime.start()
+        self.runtime.start_task("alarm", AlarmService(self.bus, self.alarm_player))
+        self.metrics = MetricsCollector(self.bus)
+        self.metrics.start()
+        store = open_store("support_companion") if open_store else None
+        self.history_recorder = HistoryRecorder(self.bus, store) if store else None
+        if self.history_recorder:
+            self.history_recorder.start()
+        self.monitors = {}  # source name -> monitor running as a runtime task
+        self.coordinator = None
+        self.relay = None
+        self.shared_selected = []  # shared sources ticked at start, run only while this instance is the poller
+        # Latest RoleChanged, applied on the Tk tick. Not read from ui_events: that queue drops its
+        # oldest events when full, and a lost role change would leave two pollers or none
+        self.role_lock = threading.Lock()
+        self.pending_role = None
+
+        self.trim_log_requested = False
+        self.watchdog = self.start_watchdog() if ResourceWatchdog else None
+
+        self.root.protocol("WM_DELETE_WINDOW", self.exit_app)
+        self.root.after(UI_PUMP_INTERVAL_MS, self.pump_events)
+
+    def start_watchdog(self):
+        watchdog = ResourceWatchdog(
+            interval=WATCHDOG_INTERVAL,
+            limits=WATCHDOG_LIMITS,
+            on_sample=lambda sample, wd: self.bus.publish(
+                ResourceSample(source="watchdog", summary=wd.summary(), sample=sample)),
+            on_message=lambda text: self.bus.publish(
+                StatusChanged(source="watchdog", message=text, log_only=True)),
+        )
+        watchdog.register_mitigation("rss_mb", "trim log", self.request_log_trim)
+        watchdog.register_mitigation("com_objects", "re-create Outlook COM session",
+                                     lambda: self.request_from_monitors("request_reconnect"))
+        watchdog.register_mitigation("children_rss_mb", "restart Chrome",
+                                     lambda: self.request_from_monitors("request_restart"))
+        watchdog.start()
+        return watchdog
+
+    def request_from_monitors(self, method):
+        # Mitigations only apply to sources that support them (e.g. only Outlook can reconnect)
+        for monitor in list(self.monitors.values()):
+            action = getattr(monitor, method, None)
+            if action:
+                action()
+
+    def start_coordinator(self):
+        coordinator = open_coordinator(
+            COORDINATION_GROUP,
+            on_role_change=self.request_role_change,
+            on_message=lambda text: self.bus.publish(StatusChanged(source="coordination", message=text, log_only=True)),
+        )
+        if coordinator is None:
+            return None
+        self.relay = CoordinationRelay(self.bus, coordinator)
+        coordinator.on_event = self.relay.receive
+        self.relay.start()
+        with self.role_lock:
+            self.pending_role = None  # A step-down from the previous session must not reach this one
+        coordinator.start()
+        return coordinator
+
+    def request_role_change(self, is_leader, lease):
+        # Called from the coordinator thread; only the latest role matters, so a newer one replaces it
+        event = RoleChanged(source="coordination", is_leader=is_leader, leader=(lease or {}).get("node", ""))
+        with self.role_lock:
+            self.pending_role = event
+        self.bus.publish(event)
+
+    def on_role_changed(self, event):
+        # Tk thread: run the shared sources only while this instance holds the poller role
+        if not self.coordinator:
+            return  # Monitoring already stopped
+        for name in self.shared_selected:
+            if event.is_leader and name not in self.monitors:
+                self.start_source(name)
+            elif not event.is_leader and name in self.monitors:
+                self.stop_source(name)
+        if event.is_leader:
+            self.update_status("👑 Polling the shared mailbox for the team")
+        else:
+            self.update_status(f"🛰️ Following poller {event.leader or '...'}")
+
+    def request_log_trim(self):
+        # Called from the watchdog thread; the trim itself happens on the Tk tick
+        self.trim_log_requested = True
+
+    def heap_snapshot(self):
+        if not self.watchdog:
+            self.append_log("⚠️ Resource watchdog not available.")
+            return
+
+        def snapshot():
+            lines = self.watchdog.snapshot_heap()
+            self.bus.publish(StatusChanged(source="watchdog", message="🔬 Heap snapshot (top allocations):", log_only=True))
+            for line in lines:
+                self.bus.publish(StatusChanged(source="watchdog", message=f"   {line}", log_only=True))
+
+        threading.Thread(target=snapshot, daemon=True).start()
+
+    def pump_events(self):
+        # Runs on the Tk thread: the only place monitor events reach widgets
+        for event in self.ui_events.drain(UI_PUMP_BATCH):
+            if isinstance(event, StatusChanged):
+                self.append_log(event.message)
+                if not event.log_only:
+                    self.update_status(event.message)
+            elif isinstance(event, Error):
+                self.append_log(event.message)
+                if event.fatal:
+                    self.update_status(f"{event.source} monitoring stopped due to error.")
+                    messagebox.showerror("Monitoring Error", event.message)
+            elif isinstance(event, ResourceSample):
+                self.resource_var.set(f"Resources: {event.summary}")
+        with self.role_lock:
+            role, self.pending_role = self.pending_role, None
+        if role is not None:
+            self.on_role_changed(role)
+        if self.trim_log_requested:
+            self.trim_log_requested = False
+            self.log_box.delete("1.0", f"end-{LOG_TRIM_LINES + 1}l")
+        self.root.after(UI_PUMP_INTERVAL_MS, self.pump_events)
 
     def update_status(self, msg):
         self.status_var.set(f"Status: {msg}")
@@ -236,48 +387,77 @@ class SupportCompanionApp:
         self.log_box.see(tk.END)
 
     def start_monitoring(self):
-        if self.email_monitor or self.whatsapp_monitor:
+        if self.monitors or self.coordinator:
             messagebox.showinfo("Info", "Monitoring already running.")
             return
 
-        global email_monitoring_enabled, wa_monitoring_enabled
-        email_monitoring_enabled = self.email_toggle_var.get()
-        wa_monitoring_enabled = self.whatsapp_toggle_var.get()
-
         self.update_status("Starting monitoring...")
-        self.append_log(">> Starting monitor threads...")
+        self.append_log(">> Starting monitor tasks...")
 
-        if email_monitoring_enabled:
-            self.email_monitor = EmailMonitor(self.alarm_player, self.update_status, self.append_log)
-            self.email_monitor.start()
+        selected = [name for name, var in self.source_toggle_vars.items() if var.get()]
+        self.shared_selected = [name for name in selected if name in SHARED_SOURCES]
+        if self.shared_selected and open_coordinator:
+            self.coordinator = self.start_coordinator()
+            if self.coordinator:
+                self.append_log(">> Team mode: electing one poller for the shared mailbox...")
 
-        if wa_monitoring_enabled:
-            self.whatsapp_monitor = WhatsAppMonitor(self.alarm_player, self.update_status, self.append_log)
-            self.whatsapp_monitor.start()
+        for name in selected:
+            if self.coordinator and name in self.shared_selected:
+                continue  # Started by on_role_changed if this instance is elected
+            self.start_source(name)
 
         prevent_sleep()
         self.start_button.config(state=tk.DISABLED)
         self.stop_button.config(state=tk.NORMAL)
 
+    def start_source(self, name):
+        try:
+            monitor_class = sources.load_source(name)
+        except ImportError as e:
+            self.append_log(f"⚠️ {name} source unavailable: {e}")
+            return
+        monitor = monitor_class(self.bus)
+        self.runtime.start_task(name, monitor)
+        self.monitors[name] = monitor
+
+    def stop_source(self, name):
+        # Cancels the task at its current await; Chrome/Outlook are released on their lane afterwards
+        self.monitors.pop(name)
+        self.runtime.stop_task(name)
+
     def stop_monitoring(self):
-        global monitoring
-        monitoring = False
         self.alarm_player.stop_alarm()
 
-        if self.email_monitor:
-            self.email_monitor.stop()
-            self.email_monitor = None
+        for name in list(self.monitors):
+            self.stop_source(name)
 
-        if self.whatsapp_monitor:
-            self.whatsapp_monitor.stop()
-            self.whatsapp_monitor = None
+        if self.coordinator:
+            self.append_log(f">> Coordination: {self.coordinator.status()}")
+            self.coordinator.stop()  # Releases the lease so another instance takes over right away
+            self.coordinator = None
+            self.relay.stop()
+            self.relay = None
 
         allow_sleep()
         self.update_status("Monitoring stopped.")
         self.append_log(">> Monitoring stopped.")
+        self.append_log(f">> Events: {self.metrics.summary()}")
+        if self.watchdog:
+            self.append_log(f">> Resources: {self.watchdog.summary()}")
         self.start_button.config(state=tk.NORMAL)
         self.stop_button.config(state=tk.DISABLED)
 
+    def exit_app(self):
+        if self.monitors or self.coordinator:
+            self.stop_monitoring()
+        self.runtime.shutdown()  # Waits for Chrome to quit and COM to uninitialise
+        if self.history_recorder:
+            # Let the recorder drain its queue, then flush the store before the daemon writer dies with the process
+            self.history_recorder.stop()
+            self.history_recorder.join(2)
+            self.history_recorder.store.close()
+        self.root.quit()
+
 if __name__ == "__main__":
     root = tk.Tk()
     app = SupportCompanionApp(root)
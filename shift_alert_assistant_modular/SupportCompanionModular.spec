@@ -1,16 +1,31 @@
 # -*- mode: python ; coding: utf-8 -*-
+import os
+
+# Build variant: SC_SOURCES=email (or email,whatsapp / file_drop ...) bundles only those
+# monitor sources and leaves the other backends' packages out of the exe.
+SOURCE_BACKENDS = {
+    'email': ('sources.email_source', ['win32com', 'pythoncom', 'pywintypes', 'win32timezone']),
+    'whatsapp': ('sources.whatsapp_source', ['selenium']),
+    'file_drop': ('sources.file_drop_source', []),
+}
+selected = [name.strip() for name in os.environ.get('SC_SOURCES', ','.join(SOURCE_BACKENDS)).split(',') if name.strip()]
+source_modules = [SOURCE_BACKENDS[name][0] for name in selected]
+backend_imports = [module for name in selected for module in SOURCE_BACKENDS[name][1]]
+excluded = [module for name, (source_module, modules) in SOURCE_BACKENDS.items() if name not in selected
+            for module in [source_module] + modules]
+suffix = '' if set(selected) == set(SOURCE_BACKENDS) else '-' + '-'.join(selected)
 
 
 a = Analysis(
     ['SupportCompanionModular.py'],
-    pathex=[],
+    pathex=['../decision_history', '../resource_watchdog', '../coordination'],
     binaries=[],
     datas=[('alarm.wav', '.')],
-    hiddenimports=['win32timezone'],
+    hiddenimports=['pygame'] + source_modules + backend_imports,
     hookspath=[],
     hooksconfig={},
     runtime_hooks=[],
-    excludes=[],
+    excludes=excluded,
     noarchive=False,
     optimize=0,
 )
@@ -22,7 +37,7 @@ exe = EXE(
     a.binaries,
     a.datas,
     [],
-    name='SupportCompanionModular',
+    name='SupportCompanionModular' + suffix,
     debug=False,
     bootloader_ignore_signals=False,
     strip=False,
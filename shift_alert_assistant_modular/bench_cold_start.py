@@ -0,0 +1,135 @@
+"""
+Cold-start benchmark.
+
+Starts a fresh interpreter per run and measures how long SupportCompanionModular
+takes to import, to load the backends of the selected sources, and (with --gui)
+to build the window and reach "monitoring started" for every source. The
+"eager" variant loads every registered backend up front, like the app did
+before sources were loaded lazily.
+
+    python bench_cold_start.py --variants email whatsapp email,whatsapp eager --runs 5
+    python bench_cold_start.py --variants email --gui --csv cold_start.csv
+"""
+import argparse
+import csv
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+def child(variant, gui):
+    """Runs inside the fresh interpreter and prints one JSON result line."""
+    start = time.perf_counter()
+    sys.path.insert(0, HERE)
+    import SupportCompanionModular as scm
+    import sources
+    result = {"import_ms": (time.perf_counter() - start) * 1000}
+
+    names = [spec.name for spec in sources.registered_sources()] if variant == "eager" else \
+        [name for name in variant.split(",") if name and name != "none"]
+    mark = time.perf_counter()
+    try:
+        for name in names:
+            sources.load_source(name)
+    except ImportError as e:
+        result["error"] = f"{type(e).__name__}: {e}"
+    result["backends_ms"] = (time.perf_counter() - mark) * 1000
+
+    if gui and "error" not in result:
+        # "eager" starts the default sources, having paid for importing all of them
+        started = [spec.name for spec in sources.registered_sources() if spec.default_enabled] if variant == "eager" else names
+        result["monitoring_ms"] = time_to_monitoring(scm, started)
+
+    result["total_ms"] = (time.perf_counter() - start) * 1000
+    result["modules"] = len(sys.modules)
+    try:
+        from resource_watchdog import process_rss_mb
+        result["rss_mb"] = process_rss_mb()
+    except ImportError:
+        result["rss_mb"] = None
+    print(json.dumps(result))
+
+def time_to_monitoring(scm, names, timeout=120):
+    """Build the real window, start the selected sources and wait for each one's 'monitoring started'."""
+    mark = time.perf_counter()
+    root = scm.tk.Tk()
+    app = scm.SupportCompanionApp(root)
+    events = app.bus.subscribe("bench", (scm.StatusChanged, scm.Error), maxsize=1000)
+    for name, var in app.source_toggle_vars.items():
+        var.set(name in names)
+    app.start_monitoring()
+
+    pending = set(app.monitors)
+    deadline = time.perf_counter() + timeout
+    while pending and time.perf_counter() < deadline:
+        root.update()
+        for event in events.drain(100):
+            if isinstance(event, scm.Error) and event.fatal or "monitoring started" in getattr(event, "message", ""):
+                pending.discard(event.source)
+        time.sleep(0.01)
+    elapsed = (time.perf_counter() - mark) * 1000
+    app.stop_monitoring()
+    app.runtime.shutdown()
+    root.destroy()
+    return elapsed if not pending else None
+
+def run_variant(variant, gui):
+    cmd = [sys.executable, os.path.abspath(__file__), "--child", variant]
+    if gui:
+        cmd.append("--gui")
+    out = subprocess.run(cmd, capture_output=True, text=True, cwd=HERE)
+    lines = out.stdout.strip().splitlines()
+    if out.returncode != 0 or not lines:
+        return {"error": (out.stderr.strip().splitlines() or ["no output"])[-1]}
+    return json.loads(lines[-1])
+
+def fmt(values):
+    values = [v for v in values if v is not None]
+    if not values:
+        return "-"
+    return f"{statistics.median(values):8.1f} (min {min(values):.1f})"
+
+def main():
+    parser = argparse.ArgumentParser(description="SupportCompanionModular cold-start benchmark")
+    parser.add_argument("--variants", nargs="+", default=["none", "email", "whatsapp", "email,whatsapp", "eager"],
+                        help="comma-separated source names per variant, 'none' or 'eager'")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--gui", action="store_true", help="also time window creation until monitoring has started")
+    parser.add_argument("--csv", help="append every run to this CSV file")
+    parser.add_argument("--child", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        child(args.child, args.gui)
+        return
+
+    rows = []
+    for variant in args.variants:
+        results = [run_variant(variant, args.gui) for _ in range(args.runs)]
+        for run, result in enumerate(results):
+            rows.append({"variant": variant, "run": run, **result})
+        errors = {r["error"] for r in results if "error" in r}
+        print(f"{variant:>16}: import {fmt([r.get('import_ms') for r in results])} ms | "
+              f"backends {fmt([r.get('backends_ms') for r in results])} ms | "
+              f"total {fmt([r.get('total_ms') for r in results])} ms | "
+              f"modules {fmt([r.get('modules') for r in results])} | "
+              f"rss {fmt([r.get('rss_mb') for r in results])} MB"
+              + (f" | monitoring {fmt([r.get('monitoring_ms') for r in results])} ms" if args.gui else ""))
+        for error in errors:
+            print(f"{'':>18}⚠️ {error}")
+
+    if args.csv:
+        fields = ["variant", "run", "import_ms", "backends_ms", "monitoring_ms", "total_ms", "modules", "rss_mb", "error"]
+        new_file = not os.path.exists(args.csv)
+        with open(args.csv, "a", newline="") as f:
+            writer = csv.DictWriter(f, fieldnames=fields, extrasaction="ignore")
+            if new_file:
+                writer.writeheader()
+            writer.writerows(rows)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+"""
+Event bus throughput benchmark.
+
+Publishes UnreadDetected events from N producer threads to one subscriber per
+drop policy and reports events/sec plus how many events each policy dropped.
+
+    python bench_event_bus.py --events 200000 --producers 2 --maxsize 1000
+"""
+import argparse
+import threading
+import time
+
+from event_bus import EventBus, UnreadDetected, POLICIES
+
+def run_policy(policy, events, producers, maxsize):
+    bus = EventBus()
+    subscription = bus.subscribe(f"bench-{policy}", (UnreadDetected,), maxsize=maxsize, policy=policy)
+    per_producer = events // producers
+    received = 0
+
+    def consume():
+        nonlocal received
+        while True:
+            event = subscription.get()
+            if event is None:
+                return
+            received += 1
+
+    def produce(index):
+        source = f"producer-{index}"
+        for n in range(per_producer):
+            bus.publish(UnreadDetected(source=source, count=n))
+
+    consumer = threading.Thread(target=consume, daemon=True)
+    consumer.start()
+    threads = [threading.Thread(target=produce, args=(i,)) for i in range(producers)]
+
+    start = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    publish_elapsed = time.perf_counter() - start
+
+    # Let the consumer finish what was queued, then close
+    while len(subscription):
+        time.sleep(0.001)
+    bus.close()
+    consumer.join()
+    total_elapsed = time.perf_counter() - start
+
+    published = per_producer * producers
+    return {
+        "policy": policy,
+        "published": published,
+        "received": received,
+        "dropped": subscription.dropped,
+        "publish_rate": published / publish_elapsed,
+        "end_to_end_rate": received / total_elapsed,
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark EventBus throughput per drop policy.")
+    parser.add_argument("--events", type=int, default=200000)
+    parser.add_argument("--producers", type=int, default=2)
+    parser.add_argument("--maxsize", type=int, default=1000)
+    args = parser.parse_args()
+
+    print(f"{'policy':<12} {'published':>10} {'received':>10} {'dropped':>9} {'publish ev/s':>14} {'e2e ev/s':>12}")
+    for policy in POLICIES:
+        r = run_policy(policy, args.events, args.producers, args.maxsize)
+        print(f"{r['policy']:<12} {r['published']:>10} {r['received']:>10} {r['dropped']:>9} "
+              f"{r['publish_rate']:>14,.0f} {r['end_to_end_rate']:>12,.0f}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,114 @@
+"""
+SourceRuntime scaling benchmark.
+
+Starts N file-drop sources (each on its own temporary folder) first as the old
+thread-per-source loop with time.sleep, then as tasks on one SourceRuntime, and
+reports extra OS threads, time until every source has polled once, and time for
+Stop to return with all of them finished.
+
+    python bench_runtime.py --sources 1 10 50 100
+"""
+import argparse
+import os
+import shutil
+import tempfile
+import threading
+import time
+
+from event_bus import EventBus, UnreadDetected
+from runtime import SourceRuntime
+from sources import file_drop_source
+from sources.file_drop_source import FileDropMonitor
+
+class ThreadedFileDrop(threading.Thread):
+    """The pre-runtime shape of a source: its own thread, blocking sleeps, stop() flips a flag."""
+
+    def __init__(self, bus, folder, name):
+        super().__init__(daemon=True)
+        self.bus = bus
+        self.folder = folder
+        self.source = name
+        self.monitoring = True
+
+    def run(self):
+        while self.monitoring:
+            with os.scandir(self.folder) as entries:
+                count = sum(1 for entry in entries if entry.is_file())
+            self.bus.publish(UnreadDetected(source=self.source, count=count))
+            time.sleep(file_drop_source.CHECK_INTERVAL)
+
+    def stop(self):
+        self.monitoring = False
+
+def wait_first_polls(subscription, names, timeout=30):
+    pending = set(names)
+    deadline = time.perf_counter() + timeout
+    while pending and time.perf_counter() < deadline:
+        event = subscription.get(timeout=0.1)
+        if event is not None:
+            pending.discard(event.source)
+    return not pending
+
+def run_threads(folders):
+    bus = EventBus()
+    polled = bus.subscribe("bench", (UnreadDetected,), maxsize=100000)
+    baseline = threading.active_count()
+    start = time.perf_counter()
+    monitors = [ThreadedFileDrop(bus, folder, f"drop-{i}") for i, folder in enumerate(folders)]
+    for monitor in monitors:
+        monitor.start()
+    wait_first_polls(polled, [m.source for m in monitors])
+    started_ms = (time.perf_counter() - start) * 1000
+    threads = threading.active_count() - baseline
+    time.sleep(0.5)  # Let every loop settle into its sleep, as when the user presses Stop
+    start = time.perf_counter()
+    for monitor in monitors:
+        monitor.stop()
+    for monitor in monitors:
+        monitor.join()
+    return threads, started_ms, (time.perf_counter() - start) * 1000
+
+def run_runtime(folders):
+    bus = EventBus()
+    polled = bus.subscribe("bench", (UnreadDetected,), maxsize=100000)
+    baseline = threading.active_count()
+    runtime = SourceRuntime()
+    runtime.start()
+    start = time.perf_counter()
+    names = []
+    for i, folder in enumerate(folders):
+        monitor = FileDropMonitor(bus, folder)
+        monitor.SOURCE = f"drop-{i}"
+        names.append(monitor.SOURCE)
+        runtime.start_task(monitor.SOURCE, monitor)
+    wait_first_polls(polled, names)
+    started_ms = (time.perf_counter() - start) * 1000
+    threads = threading.active_count() - baseline
+    time.sleep(0.5)
+    start = time.perf_counter()
+    for future in [runtime.stop_task(name) for name in names]:
+        future.result()
+    stopped_ms = (time.perf_counter() - start) * 1000
+    runtime.shutdown()
+    return threads, started_ms, stopped_ms
+
+def main():
+    parser = argparse.ArgumentParser(description="Thread-per-source loops vs. one SourceRuntime")
+    parser.add_argument("--sources", type=int, nargs="+", default=[1, 10, 50, 100])
+    args = parser.parse_args()
+
+    print(f"{'sources':>8} {'mode':>8} {'threads':>8} {'all polled':>12} {'stop all':>10}")
+    for count in args.sources:
+        workdir = tempfile.mkdtemp(prefix="l1_runtime_bench_")
+        folders = [os.path.join(workdir, str(i)) for i in range(count)]
+        for folder in folders:
+            os.makedirs(folder)
+        try:
+            for mode, runner in (("threads", run_threads), ("runtime", run_runtime)):
+                threads, started_ms, stopped_ms = runner(folders)
+                print(f"{count:>8} {mode:>8} {threads:>8} {started_ms:>10.1f}ms {stopped_ms:>8.1f}ms", flush=True)
+        finally:
+            shutil.rmtree(workdir, ignore_errors=True)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,223 @@
+import asyncio
+import collections
+import dataclasses
+import threading
+import time
+from dataclasses import dataclass, field
+
+# === Event Types ===
+@dataclass(frozen=True, kw_only=True)
+class Event:
+    source: str
+    timestamp: float = field(default_factory=time.time)
+
+@dataclass(frozen=True, kw_only=True)
+class UnreadDetected(Event):
+    count: int
+
+@dataclass(frozen=True, kw_only=True)
+class StatusChanged(Event):
+    message: str
+    log_only: bool = False  # True = log line only, don't replace the status label
+
+@dataclass(frozen=True, kw_only=True)
+class Error(Event):
+    message: str
+    fatal: bool = False  # True = the source has stopped
+
+@dataclass(frozen=True, kw_only=True)
+class AlarmStarted(Event):
+    latency_ms: float  # detection -> alarm sounding
+
+@dataclass(frozen=True, kw_only=True)
+class ResourceSample(Event):
+    summary: str   # one-line trend text for the GUI
+    sample: dict   # raw watchdog sample (rss_mb, threads, handles, com_objects, ...)
+
+@dataclass(frozen=True, kw_only=True)
+class RoleChanged(Event):
+    is_leader: bool   # True = this instance is now the elected poller for shared sources
+    leader: str = ""  # node id of the current poller, if known
+
+EVENT_TYPES = {cls.__name__: cls for cls in (UnreadDetected, StatusChanged, Error, AlarmStarted, ResourceSample, RoleChanged)}
+
+def to_dict(event):
+    """JSON-friendly form of an event, used to relay events between instances."""
+    return {"type": type(event).__name__, **dataclasses.asdict(event)}
+
+def from_dict(data, **overrides):
+    """Rebuild an event from to_dict() output. The timestamp is reset to local receipt time unless overridden."""
+    cls = EVENT_TYPES[data["type"]]
+    names = {f.name for f in dataclasses.fields(cls)} - {"timestamp"}
+    values = {key: value for key, value in data.items() if key in names}
+    values.update(overrides)
+    return cls(**values)
+
+# === Drop Policies ===
+BLOCK = "block"              # publisher waits (backpressure) up to block_timeout, then drops the new event
+DROP_NEWEST = "drop_newest"  # queue full -> discard the event being published
+DROP_OLDEST = "drop_oldest"  # queue full -> discard the oldest queued event
+
+POLICIES = (BLOCK, DROP_NEWEST, DROP_OLDEST)
+
+class Subscription:
+    """
+    Bounded FIFO owned by a single consumer.
+    Publishers call offer(); the consumer drains with get(), get_async() or drain().
+    """
+
+    def __init__(self, name, event_types, maxsize, policy, block_timeout):
+        if policy not in POLICIES:
+            raise ValueError(f"Unknown drop policy: {policy}")
+        if maxsize < 1:
+            raise ValueError("maxsize must be at least 1")
+        self.name = name
+        self.event_types = tuple(event_types)
+        self.maxsize = maxsize
+        self.policy = policy
+        self.block_timeout = block_timeout
+        self.delivered = 0
+        self.dropped = 0
+        self.closed = False
+        self._queue = collections.deque()
+        self._cond = threading.Condition()
+        self._waiters = []  # (loop, future) of get_async() callers
+
+    def wants(self, event):
+        return isinstance(event, self.event_types)
+
+    def offer(self, event):
+        """Enqueue an event according to the drop policy. Returns True if it was queued."""
+        with self._cond:
+            if self.closed:
+                return False
+
+            if len(self._queue) >= self.maxsize:
+                if self.policy == DROP_OLDEST:
+                    self._queue.popleft()
+                    self.dropped += 1
+                elif self.policy == BLOCK:
+                    deadline = time.monotonic() + self.block_timeout
+                    while len(self._queue) >= self.maxsize and not self.closed:
+                        remaining = deadline - time.monotonic()
+                        if remaining <= 0:
+                            break
+                        self._cond.wait(remaining)
+                    if self.closed or len(self._queue) >= self.maxsize:
+                        self.dropped += 1
+                        return False
+                else:
+                    self.dropped += 1
+                    return False
+
+            self._queue.append(event)
+            self.delivered += 1
+            self._cond.notify_all()
+            self._wake_async()
+            return True
+
+    def get(self, timeout=None):
+        """Block until an event is available. Returns None on timeout or when closed and empty."""
+        with self._cond:
+            if not self._queue and not self.closed:
+                self._cond.wait_for(lambda: self._queue or self.closed, timeout)
+            if not self._queue:
+                return None
+            event = self._queue.popleft()
+            self._cond.notify_all()
+            return event
+
+    async def get_async(self):
+        """get() for a consumer task on an asyncio loop. Returns None when closed and empty; cancellable."""
+        loop = asyncio.get_running_loop()
+        while True:
+            with self._cond:
+                if self._queue:
+                    event = self._queue.popleft()
+                    self._cond.notify_all()
+                    return event
+                if self.closed:
+                    return None
+                waiter = loop.create_future()
+                self._waiters.append((loop, waiter))
+            await waiter
+
+    def _wake_async(self):
+        # Called under self._cond; publishers may be on any thread
+        for loop, waiter in self._waiters:
+            try:
+                loop.call_soon_threadsafe(_resolve, waiter)
+            except RuntimeError:
+                pass  # Runtime already shut down
+        self._waiters = []
+
+    def drain(self, limit=None):
+        """Pop up to `limit` queued events without blocking (used from the Tk tick)."""
+        with self._cond:
+            count = len(self._queue) if limit is None else min(limit, len(self._queue))
+            events = [self._queue.popleft() for _ in range(count)]
+            if events:
+                self._cond.notify_all()
+            return events
+
+    def close(self):
+        with self._cond:
+            self.closed = True
+            self._cond.notify_all()
+            self._wake_async()
+
+    def __len__(self):
+        with self._cond:
+            return len(self._queue)
+
+def _resolve(waiter):
+    if not waiter.done():  # The waiting task may have been cancelled meanwhile
+        waiter.set_result(None)
+
+class EventBus:
+    """
+    In-process publish/subscribe bus.
+    Monitor tasks publish events; the GUI, alarm and metrics each own a
+    bounded Subscription and consume it on their own thread, runtime task or
+    Tk tick, so monitors never touch Tk widgets directly.
+    """
+
+    def __init__(self):
+        self._subscriptions = []
+        self._lock = threading.Lock()
+        self.published = 0
+
+    def subscribe(self, name, event_types=(Event,), maxsize=1000, policy=DROP_OLDEST, block_timeout=0.5):
+        subscription = Subscription(name, event_types, maxsize, policy, block_timeout)
+        with self._lock:
+            self._subscriptions = self._subscriptions + [subscription]
+        return subscription
+
+    def unsubscribe(self, subscription):
+        subscription.close()
+        with self._lock:
+            self._subscriptions = [s for s in self._subscriptions if s is not subscription]
+
+    def publish(self, event):
+        # Copy-on-write list: deliver to a snapshot so offer() never runs under the bus lock
+        with self._lock:
+            self.published += 1
+            subscriptions = self._subscriptions
+        for subscription in subscriptions:
+            if subscription.wants(event):
+                subscription.offer(event)
+
+    def stats(self):
+        return {
+            "published": self.published,
+            "subscribers": {
+                s.name: {"queued": len(s), "delivered": s.delivered, "dropped": s.dropped}
+                for s in self._subscriptions
+            },
+        }
+
+    def close(self):
+        with self._lock:
+            subscriptions, self._subscriptions = self._subscriptions, []
+        for subscription in subscriptions:
+            subscription.close()
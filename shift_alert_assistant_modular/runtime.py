@@ -0,0 +1,148 @@
+"""
+One asyncio loop for every monitor source and the alarm.
+
+Sources and the alarm service run as tasks on a single loop thread. Blocking
+backend calls (Outlook COM, Selenium, disk) go through run_blocking() onto
+executor lanes: one single-thread lane per backend (COM objects must stay on
+the thread that created them) plus a small shared pool for everything else.
+The thread count is fixed by the number of lanes, not the number of sources.
+Waits are asyncio sleeps, so stopping a source cancels it immediately; its
+close() then releases backend resources on the same lane before the task ends.
+
+The Tk thread only talks to the runtime through start_task / stop_task /
+shutdown; results come back over the event bus and the GUI's pump.
+"""
+import asyncio
+import concurrent.futures
+import functools
+import threading
+
+DEFAULT_WORKERS = 2   # shared pool for blocking calls without a lane (disk, pygame)
+STOP_TIMEOUT = 5.0    # seconds a cancelled task gets to run its close()
+
+class Lane:
+    """Single-thread executor for one backend; `finalizer` runs on it at shutdown (e.g. CoUninitialize)."""
+
+    def __init__(self, name, initializer=None, finalizer=None):
+        self.name = name
+        self.finalizer = finalizer
+        self.executor = concurrent.futures.ThreadPoolExecutor(
+            max_workers=1, thread_name_prefix=f"lane-{name}", initializer=initializer)
+
+class SourceRuntime:
+    """
+    Runs workers (objects with `async run()` and `async close()`) as tasks on one
+    event loop thread. `speed` divides every sleep(), for accelerated soak runs.
+    """
+
+    def __init__(self, workers=DEFAULT_WORKERS, speed=1.0, stop_timeout=STOP_TIMEOUT):
+        self.speed = speed
+        self.stop_timeout = stop_timeout
+        self.loop = asyncio.new_event_loop()
+        self.default_executor = concurrent.futures.ThreadPoolExecutor(
+            max_workers=workers, thread_name_prefix="runtime-io")
+        self.loop.set_default_executor(self.default_executor)
+        self.lanes = {}
+        self.tasks = {}  # name -> (worker, task)
+        self.stopping = set()  # tasks already cancelled, so a second stop only waits
+        self.thread = threading.Thread(target=self._run_loop, daemon=True, name="SourceRuntime")
+
+    def _run_loop(self):
+        asyncio.set_event_loop(self.loop)
+        try:
+            self.loop.run_forever()
+        finally:
+            self.loop.close()
+
+    # --- called from the Tk (or any other) thread ---
+    def start(self):
+        self.thread.start()
+
+    def submit(self, coro):
+        """Schedule a coroutine on the runtime loop. Returns a concurrent.futures.Future."""
+        return asyncio.run_coroutine_threadsafe(coro, self.loop)
+
+    def start_task(self, name, worker):
+        """Run `worker` as task `name`, replacing (and first stopping) any task of that name."""
+        return self.submit(self._start(name, worker))
+
+    def stop_task(self, name):
+        """Cancel task `name`. Returns at once; the task's close() finishes on the loop."""
+        return self.submit(self._stop(name))
+
+    def running(self):
+        return sorted(self.tasks)
+
+    def shutdown(self, timeout=None):
+        """Cancel every task, wait for their close(), finalize the lanes and stop the loop thread."""
+        if not self.thread.is_alive():
+            return
+        timeout = self.stop_timeout * 2 if timeout is None else timeout
+        try:
+            self.submit(self._shutdown()).result(timeout)
+        except (concurrent.futures.TimeoutError, RuntimeError):
+            pass  # A backend call is hung; the daemon threads die with the process
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self.thread.join(timeout)
+
+    # --- used by workers on the loop ---
+    def lane(self, name, initializer=None, finalizer=None):
+        """Get or create the executor lane `name`. The first caller's initializer/finalizer win."""
+        if name not in self.lanes:
+            self.lanes[name] = Lane(name, initializer, finalizer)
+        return self.lanes[name]
+
+    async def run_blocking(self, lane, fn, *args, **kwargs):
+        """
+        Run a blocking call on lane `lane` (None = shared pool). Cancelling the
+        awaiting task returns at once; the call itself finishes in the background
+        and later calls on the same lane queue behind it.
+        """
+        executor = self.lanes[lane].executor if lane else None
+        return await self.loop.run_in_executor(executor, functools.partial(fn, *args, **kwargs))
+
+    async def sleep(self, seconds):
+        await asyncio.sleep(seconds / self.speed)
+
+    # --- loop side ---
+    async def _start(self, name, worker):
+        if name in self.tasks:
+            await self._stop(name)
+        worker.runtime = self
+        task = self.loop.create_task(self._supervise(name, worker), name=name)
+        self.tasks[name] = (worker, task)
+
+    async def _supervise(self, name, worker):
+        try:
+            await worker.run()
+        finally:
+            try:
+                await worker.close()
+            except Exception:
+                pass  # Backend already gone; nothing left to release
+            task = asyncio.current_task()
+            self.stopping.discard(task)
+            if self.tasks.get(name, (None, None))[1] is task:
+                del self.tasks[name]
+
+    async def _stop(self, name):
+        entry = self.tasks.get(name)
+        if entry is None:
+            return
+        task = entry[1]
+        if task not in self.stopping:
+            self.stopping.add(task)
+            task.cancel()
+        await asyncio.wait([task], timeout=self.stop_timeout)
+
+    async def _shutdown(self):
+        await asyncio.gather(*(self._stop(name) for name in list(self.tasks)))
+        for lane in self.lanes.values():
+            if lane.finalizer:
+                try:
+                    await self.loop.run_in_executor(lane.executor, lane.finalizer)
+                except Exception:
+                    pass
+            lane.executor.shutdown(wait=False)
+        self.lanes = {}
+        self.default_executor.shutdown(wait=False)
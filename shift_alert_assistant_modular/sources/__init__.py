@@ -0,0 +1,46 @@
+"""
+Monitor source registry.
+
+Each source is registered by name with the module and class that implement
+it. Nothing is imported until load_source() is called for a source the user
+actually enabled, so unticking "Monitor WhatsApp" never loads selenium and a
+slim build can leave whole backends out.
+"""
+import importlib
+import importlib.util
+from collections import namedtuple
+
+SourceSpec = namedtuple("SourceSpec", ["name", "label", "module", "class_name", "default_enabled"])
+
+_REGISTRY = {}
+
+def register_source(name, label, module, class_name, default_enabled=True):
+    """Add a source. `module` is imported lazily, e.g. register_source("teams", "Monitor Teams", "sources.teams_source", "TeamsMonitor")."""
+    _REGISTRY[name] = SourceSpec(name, label, module, class_name, default_enabled)
+
+def registered_sources():
+    return list(_REGISTRY.values())
+
+def is_available(name):
+    """True if the source's module is present (in a slim build it may be excluded), without importing it."""
+    spec = _REGISTRY.get(name)
+    if spec is None:
+        return False
+    try:
+        return importlib.util.find_spec(spec.module) is not None
+    except (ImportError, ValueError):
+        return False
+
+def available_sources():
+    return [spec for spec in _REGISTRY.values() if is_available(spec.name)]
+
+def load_source(name):
+    """Import the backend for `name` and return its monitor class. Raises ImportError if it isn't bundled."""
+    spec = _REGISTRY[name]
+    module = importlib.import_module(spec.module)
+    return getattr(module, spec.class_name)
+
+# === Built-in sources ===
+register_source("email", "Monitor Outlook", "sources.email_source", "EmailMonitor")
+register_source("whatsapp", "Monitor WhatsApp", "sources.whatsapp_source", "WhatsAppMonitor")
+register_source("file_drop", "Monitor Drop Folder", "sources.file_drop_source", "FileDropMonitor", default_enabled=False)
@@ -0,0 +1,40 @@
+from event_bus import StatusChanged
+
+class MonitorSource:
+    """
+    Base class for monitor sources.
+    A source is a task on the SourceRuntime loop: run() polls one backend,
+    pushing blocking calls onto its executor lane with call(), and only talks
+    to the rest of the app through the event bus (UnreadDetected /
+    StatusChanged / Error). Stopping cancels the task at its current await;
+    close() then releases the backend.
+    """
+
+    SOURCE = None  # Registry name, also used as the event source
+    LANE = None    # Executor lane for blocking backend calls; None = the runtime's shared pool
+
+    def __init__(self, bus):
+        self.bus = bus
+        self.runtime = None  # Set by SourceRuntime.start_task
+
+    def lane_hooks(self):
+        """(initializer, finalizer) run on the lane thread, e.g. COM apartment setup."""
+        return None, None
+
+    async def call(self, fn, *args):
+        """Run a blocking backend call on this source's lane."""
+        if self.LANE and self.LANE not in self.runtime.lanes:
+            self.runtime.lane(self.LANE, *self.lane_hooks())
+        return await self.runtime.run_blocking(self.LANE, fn, *args)
+
+    async def sleep(self, seconds):
+        await self.runtime.sleep(seconds)
+
+    async def run(self):
+        raise NotImplementedError
+
+    async def close(self):
+        pass
+
+    def publish_status(self, msg, log_only=False):
+        self.bus.publish(StatusChanged(source=self.SOURCE, message=msg, log_only=log_only))
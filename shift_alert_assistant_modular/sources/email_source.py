@@ -0,0 +1,83 @@
+import time
+
+import pythoncom
+import win32com.client
+
+from event_bus import UnreadDetected, Error
+from sources.base import MonitorSource
+
+# === CONFIGURATION ===
+CHECK_INTERVAL = 10
+SHARED_MAILBOX = "LE-HELPDESK.PH@fpt.com"
+
+# === Outlook Monitoring ===
+class EmailMonitor(MonitorSource):
+    SOURCE = "email"
+    LANE = "com"  # Every Outlook call runs on one COM-initialised thread, shared by all Outlook sources
+
+    def __init__(self, bus):
+        super().__init__(bus)
+        self.inbox = None  # COM proxy; only created, used and released on the lane thread
+        self.reconnect_requested = False
+
+    def lane_hooks(self):
+        return pythoncom.CoInitialize, pythoncom.CoUninitialize
+
+    def connect_inbox(self):
+        self.inbox = None  # Drop the old proxies before dispatching again
+        outlook = win32com.client.Dispatch("Outlook.Application")
+        namespace = outlook.GetNamespace("MAPI")
+        for account in namespace.Folders:
+            if account.Name.lower() == SHARED_MAILBOX.lower():
+                self.inbox = account.Folders["Inbox"]
+                break
+        return self.inbox is not None
+
+    def count_unread(self):
+        unread_items = self.inbox.Items.Restrict("[Unread]=true")
+        count = unread_items.Count
+        del unread_items  # Release the Restrict collection's COM proxy now, not at the next poll
+        return count
+
+    def release(self):
+        self.inbox = None
+
+    def request_reconnect(self):
+        """Watchdog mitigation: drop every COM proxy and dispatch Outlook again before the next poll."""
+        self.reconnect_requested = True
+
+    async def run(self):
+        try:
+            if not await self.call(self.connect_inbox):
+                self.publish_status(f"❌ Could not find Inbox for '{SHARED_MAILBOX}'")
+                self.bus.publish(Error(source=self.SOURCE, message=f"Shared mailbox '{SHARED_MAILBOX}' not found.", fatal=True))
+                return
+
+            self.publish_status("Email monitoring started...")
+
+            while True:
+                if self.reconnect_requested:
+                    self.reconnect_requested = False
+                    connected = await self.call(self.connect_inbox)
+                    self.publish_status("🔌 Outlook COM session re-created", log_only=True)
+                    if not connected:
+                        raise RuntimeError(f"Shared mailbox '{SHARED_MAILBOX}' not found after reconnect.")
+
+                try:
+                    unread_count = await self.call(self.count_unread)
+
+                    log_msg = f"[{time.strftime('%H:%M:%S')}] Unread emails: {unread_count}"
+                    self.publish_status(log_msg)
+                    self.bus.publish(UnreadDetected(source=self.SOURCE, count=unread_count))
+
+                except Exception as check_err:
+                    self.bus.publish(Error(source=self.SOURCE, message=f"⚠️ Email error: {check_err}"))
+
+                await self.sleep(CHECK_INTERVAL)
+
+        except Exception as e:
+            self.publish_status("Email monitoring stopped due to error.")
+            self.bus.publish(Error(source=self.SOURCE, message=f"❌ Email Monitor Error:\n{e}", fatal=True))
+
+    async def close(self):
+        await self.call(self.release)
@@ -0,0 +1,40 @@
+import os
+
+from event_bus import UnreadDetected, Error
+from sources.base import MonitorSource
+
+# === CONFIGURATION ===
+DROP_FOLDER = os.path.join(os.path.expanduser("~"), "SupportCompanionDrop")
+CHECK_INTERVAL = 5
+
+# === File Drop Monitoring ===
+class FileDropMonitor(MonitorSource):
+    """Alerts while any file is waiting in `folder` (e.g. exports from other tools)."""
+
+    SOURCE = "file_drop"
+
+    def __init__(self, bus, folder=DROP_FOLDER):
+        super().__init__(bus)
+        self.folder = folder
+
+    def count_files(self):
+        with os.scandir(self.folder) as entries:
+            return sum(1 for entry in entries if entry.is_file())
+
+    async def run(self):
+        try:
+            await self.call(os.makedirs, self.folder, 0o777, True)
+            self.publish_status(f"File drop monitoring started ({self.folder})...")
+
+            while True:
+                try:
+                    count = await self.call(self.count_files)
+                    if count:
+                        self.publish_status(f"📂 {count} file(s) waiting in {self.folder}", log_only=True)
+                    self.bus.publish(UnreadDetected(source=self.SOURCE, count=count))
+                except OSError as check_err:
+                    self.bus.publish(Error(source=self.SOURCE, message=f"⚠️ File drop error: {check_err}"))
+                await self.sleep(CHECK_INTERVAL)
+
+        except Exception as e:
+            self.bus.publish(Error(source=self.SOURCE, message=f"❌ File Drop Monitor Error: {e}", fatal=True))
@@ -0,0 +1,84 @@
+import os
+
+from selenium import webdriver
+from selenium.webdriver.chrome.service import Service
+from selenium.webdriver.chrome.options import Options
+
+from event_bus import UnreadDetected, Error
+from sources.base import MonitorSource
+
+# === CONFIGURATION ===
+CHROMEDRIVER_PATH = "chromedriver.exe"
+CHECK_INTERVAL = 5
+LOGIN_WAIT = 15
+
+# === WhatsApp Monitoring ===
+class WhatsAppMonitor(MonitorSource):
+    SOURCE = "whatsapp"
+    LANE = "browser"  # WebDriver calls are serialised on one thread
+
+    def __init__(self, bus):
+        super().__init__(bus)
+        self.driver = None
+        self.restart_requested = False
+
+    def open_browser(self):
+        options = Options()
+        profile_path = os.path.join(os.environ["TEMP"], "wa_profile_temp")
+        options.add_argument(f"user-data-dir={profile_path}")
+        options.add_argument("--disable-dev-shm-usage")
+        options.add_argument("--no-sandbox")
+        options.add_argument("--remote-debugging-port=9222")
+        options.add_experimental_option("excludeSwitches", ["enable-logging"])
+
+        self.driver = webdriver.Chrome(service=Service(CHROMEDRIVER_PATH), options=options)
+        self.driver.get("https://web.whatsapp.com")
+
+    def quit_browser(self):
+        if self.driver:
+            driver, self.driver = self.driver, None
+            driver.quit()
+
+    def count_unread(self):
+        return len(self.driver.find_elements("xpath", "//span[contains(@aria-label, 'unread message')]"))
+
+    async def start_browser(self):
+        await self.call(self.open_browser)
+        self.publish_status("🔗 Waiting for WhatsApp Web login...", log_only=True)
+        await self.sleep(LOGIN_WAIT)
+
+    def request_restart(self):
+        """Watchdog mitigation: quit Chrome and start a fresh one (the profile keeps the login)."""
+        self.restart_requested = True
+
+    async def run(self):
+        try:
+            await self.start_browser()
+
+            self.publish_status("WhatsApp monitoring started...")
+
+            while True:
+                if self.restart_requested:
+                    self.restart_requested = False
+                    await self.call(self.quit_browser)
+                    await self.start_browser()
+                    self.publish_status("🔄 Chrome restarted", log_only=True)
+
+                try:
+                    unread = await self.call(self.count_unread)
+                    self.publish_status(f"🧪 Found {unread} unread badge(s) on WhatsApp.", log_only=True)
+
+                    if unread:
+                        self.publish_status("📲 WhatsApp: Unread message(s) detected!", log_only=True)
+                    self.bus.publish(UnreadDetected(source=self.SOURCE, count=unread))
+
+                except Exception as inner:
+                    self.bus.publish(Error(source=self.SOURCE, message=f"⚠️ WhatsApp error: {inner}"))
+
+                await self.sleep(CHECK_INTERVAL)
+
+        except Exception as e:
+            self.bus.publish(Error(source=self.SOURCE, message=f"❌ WhatsApp Monitor Error: {e}", fatal=True))
+
+    async def close(self):
+        await self.call(self.quit_browser)
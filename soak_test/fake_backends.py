@@ -0,0 +1,316 @@
+"""
+Simulated Outlook / WhatsApp Web backends for the soak runner.
+
+install_fake_modules() registers stand-ins for win32com, pythoncom, pygame,
+selenium and win10toast in sys.modules so the real SupportCompanionModular
+and email_categorizer_outlook code runs unchanged on any machine.
+"""
+import html.parser
+import itertools
+import os
+import re
+import sys
+import tempfile
+import threading
+import time
+import types
+import uuid
+from datetime import datetime
+
+# === Clock ===
+class ScaledClock:
+    """
+    Drop-in for the `time` module inside the apps: sleeps run `speed` times
+    faster, everything else is the real clock. Durations measured with real
+    time are converted back to simulated seconds with sim().
+    """
+
+    def __init__(self, speed):
+        self.speed = speed
+        self.start = time.monotonic()
+
+    def sleep(self, seconds):
+        time.sleep(seconds / self.speed)
+
+    def sim(self, real_seconds):
+        return real_seconds * self.speed
+
+    def sim_now(self):
+        return (time.monotonic() - self.start) * self.speed
+
+    def __getattr__(self, name):
+        return getattr(time, name)
+
+# === Outlook (COM-style object model) ===
+class FakeAttachment:
+    def __init__(self, file_name):
+        self.FileName = file_name
+
+class FakeCollection(list):
+    @property
+    def Count(self):
+        return len(self)
+
+class FakeMailItem:
+    def __init__(self, subject, sender_name, sender_address, body="", attachments=(), conversation_id=None):
+        self.Subject = subject
+        self.SenderName = sender_name
+        self.SenderEmailAddress = sender_address
+        self.Body = body
+        self.Categories = ""
+        self.UnRead = True
+        self.EntryID = uuid.uuid4().hex
+        self.ConversationID = conversation_id or uuid.uuid4().hex
+        self.ConversationIndex = ""
+        self.ReceivedTime = datetime.now()
+        self.Attachments = FakeCollection(FakeAttachment(name) for name in attachments)
+        self.injected_at = time.monotonic()
+        self.categorized_at = None
+        self.detected_at = None
+
+    def Save(self):
+        if self.Categories and self.categorized_at is None:
+            self.categorized_at = time.monotonic()
+
+class FakeItems:
+    def __init__(self, mailbox):
+        self.mailbox = mailbox
+
+    def Restrict(self, query):
+        # Only the filters the apps use: "[Unread]=true" / "[Unread] = true", optionally
+        # "AND [ReceivedTime] >= 'mm/dd/yyyy hh:mm AM'" (Outlook compares to the minute)
+        match = re.search(r"\[ReceivedTime\]\s*>=\s*'([^']+)'", query)
+        since = datetime.strptime(match.group(1), "%m/%d/%Y %I:%M %p") if match else None
+        return self.mailbox.restrict(unread_only="unread" in query.lower(), since=since)
+
+class FakeFolder:
+    def __init__(self, name, mailbox=None):
+        self.Name = name
+        self.Items = FakeItems(mailbox) if mailbox else None
+        self.StoreID = mailbox.name if mailbox else None
+        self.Folders = {}
+
+class FakeCategory:
+    def __init__(self, name, color):
+        self.Name = name
+        self.Color = color
+
+class FakeNamespace:
+    def __init__(self, mailbox):
+        account = FakeFolder(mailbox.name)
+        account.Folders["Inbox"] = FakeFolder("Inbox", mailbox)
+        self.Folders = [account]
+        self.Categories = [FakeCategory(name, color) for name, color in mailbox.categories.items()]
+        self.mailbox = mailbox
+
+    def GetItemFromID(self, entry_id, store_id=None):
+        if store_id != self.mailbox.name:
+            # Like Outlook: items of a non-default store are only found with that store's StoreID
+            raise LookupError(f"The message {entry_id} is not in the default store")
+        item = self.mailbox.find(entry_id)
+        if item is None:
+            raise LookupError(f"The message {entry_id} is no longer in the store")  # Outlook raises com_error
+        return item
+
+class FakeOutlookApplication:
+    def __init__(self, mailbox):
+        self.mailbox = mailbox
+
+    def GetNamespace(self, name):
+        return FakeNamespace(self.mailbox)
+
+class FakeMailbox:
+    """Shared mailbox that the injector fills and the monitors poll."""
+
+    def __init__(self, name, categories=None):
+        self.name = name
+        self.categories = categories or {"KARL": 4, "ADRIAN": 3}
+        self.items = []
+        self.by_id = {}
+        self.lock = threading.Lock()
+        self.restrict_times = []  # monotonic time of every Restrict call, for poll-drift stats
+
+    def deliver(self, item):
+        with self.lock:
+            self.items.append(item)
+            self.by_id[item.EntryID] = item
+        return item
+
+    def find(self, entry_id):
+        with self.lock:
+            return self.by_id.get(entry_id)
+
+    def restrict(self, unread_only, since=None):
+        with self.lock:
+            self.restrict_times.append(time.monotonic())
+            return FakeCollection(i for i in self.items if (i.UnRead or not unread_only)
+                                  and (since is None or i.ReceivedTime.replace(second=0, microsecond=0) >= since))
+
+    def mark_read(self, older_than):
+        """The agent reads everything that has been waiting longer than `older_than` (monotonic)."""
+        with self.lock:
+            for item in self.items:
+                if item.UnRead and item.injected_at <= older_than:
+                    item.UnRead = False
+            # Read mail leaves the simulated inbox so the fake doesn't grow forever
+            self.items = [i for i in self.items if i.UnRead]
+            self.by_id = {i.EntryID: i for i in self.items}
+
+# === Mail generator ===
+RELEVANT_SUBJECTS = [
+    "Request to change mobile number",
+    "Unlock user account",
+    "Reset password for VPN",
+    "Update contact number",
+    "Migrate phone to new device",
+    "DDT request form",
+]
+OTHER_SUBJECTS = [
+    "Weekly newsletter",
+    "Meeting invite: shift handover",
+    "UCUBE daily report",
+    "System maintenance notice",
+    "Number of open tickets",
+]
+
+class MailGenerator:
+    """Deterministic mix of relevant/irrelevant mail, replies and ticket numbers."""
+
+    def __init__(self):
+        self.counter = itertools.count(1)
+        self.threads = []
+
+    def next_item(self):
+        n = next(self.counter)
+        if self.threads and n % 4 == 0:
+            subject, conversation_id = self.threads[n % len(self.threads)]
+            subject = "RE: " + subject
+        else:
+            pool = RELEVANT_SUBJECTS if n % 3 else OTHER_SUBJECTS
+            subject = f"{pool[n % len(pool)]} INC{100000 + n}"
+            conversation_id = uuid.uuid4().hex
+            self.threads = (self.threads + [(subject, conversation_id)])[-50:]
+        attachments = ["change_form.pdf"] if n % 7 == 0 else []
+        return FakeMailItem(subject, f"User {n % 40}", f"user{n % 40}@fpt.com",
+                            body="Hello team, please help.", attachments=attachments,
+                            conversation_id=conversation_id)
+
+# === WhatsApp Web stand-in ===
+class _UnreadSpanParser(html.parser.HTMLParser):
+    def __init__(self, needle):
+        super().__init__()
+        self.needle = needle
+        self.matches = []
+
+    def handle_starttag(self, tag, attrs):
+        if tag == "span":
+            label = dict(attrs).get("aria-label") or ""
+            if self.needle in label:
+                self.matches.append(label)
+
+class FakeWhatsAppWeb:
+    """
+    A static HTML page with one `aria-label="N unread messages"` badge per
+    chat, rewritten by the injector. The fake driver re-parses the file on
+    every find_elements() call, like a real DOM query.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.lock = threading.Lock()
+        self.pending = []  # monotonic injection times not yet detected
+        self.set_unread([])
+
+    def set_unread(self, counts):
+        badges = "\n".join(f'<div class="chat"><span aria-label="{c} unread messages">{c}</span></div>' for c in counts)
+        with self.lock:
+            with open(self.path, "w", encoding="utf-8") as f:
+                f.write(f"<html><body><div id=\"pane-side\">\n{badges}\n</div></body></html>")
+
+    def inject(self, chats):
+        with self.lock:
+            self.pending.append(time.monotonic())
+        self.set_unread([1] * chats)
+
+    def read(self):
+        with self.lock:
+            with open(self.path, "r", encoding="utf-8") as f:
+                return f.read()
+
+class FakeWebElement:
+    def __init__(self, label):
+        self.label = label
+
+    def get_attribute(self, name):
+        return self.label if name == "aria-label" else None
+
+class FakeChromeDriver:
+    def __init__(self, page, *args, **kwargs):
+        self.page = page
+        self.closed = False
+
+    def get(self, url):
+        pass
+
+    def find_elements(self, by, xpath):
+        match = re.search(r"contains\(@aria-label,\s*'([^']+)'\)", xpath)
+        parser = _UnreadSpanParser(match.group(1) if match else "")
+        parser.feed(self.page.read())
+        return [FakeWebElement(label) for label in parser.matches]
+
+    def quit(self):
+        self.closed = True
+
+# === sys.modules wiring ===
+class FakeMusic:
+    def __init__(self):
+        self.playing = False
+
+    def load(self, path):
+        pass
+
+    def play(self, loops=0):
+        self.playing = True
+
+    def stop(self):
+        self.playing = False
+
+    def get_busy(self):
+        return self.playing
+
+def install_fake_modules(mailbox, whatsapp_page):
+    """Register the fakes under the real module names. Call before importing the apps."""
+    def module(name, **attrs):
+        mod = types.ModuleType(name)
+        mod.__dict__.update(attrs)
+        sys.modules[name] = mod
+        return mod
+
+    module("pythoncom", CoInitialize=lambda: None, CoUninitialize=lambda: None)
+    client = module("win32com.client", Dispatch=lambda name: FakeOutlookApplication(mailbox))
+    module("win32com", client=client)
+
+    music = FakeMusic()
+    mixer = types.SimpleNamespace(init=lambda: None, music=music)
+    module("pygame", mixer=mixer)
+
+    class Options:
+        def add_argument(self, arg):
+            pass
+
+        def add_experimental_option(self, name, value):
+            pass
+
+    service = module("selenium.webdriver.chrome.service", Service=lambda path=None: None)
+    options = module("selenium.webdriver.chrome.options", Options=Options)
+    chrome = module("selenium.webdriver.chrome", service=service, options=options)
+    webdriver = module("selenium.webdriver", Chrome=lambda *a, **kw: FakeChromeDriver(whatsapp_page), chrome=chrome)
+    module("selenium", webdriver=webdriver)
+
+    class ToastNotifier:
+        def show_toast(self, *args, **kwargs):
+            pass
+
+    module("win10toast", ToastNotifier=ToastNotifier)
+    os.environ.setdefault("TEMP", tempfile.gettempdir())
+    return music
@@ -0,0 +1,314 @@
+"""
+Headless soak / load run of the full monitor stack against simulated backends.
+
+Runs SupportCompanionModular (email + WhatsApp monitors, alarm, metrics,
+history) and the Email Categorizer's monitor loop at accelerated time,
+injects mail and WhatsApp messages at configurable rates and bursts, and
+samples detection latency, throughput, RSS, thread and handle counts.
+Exits with status 1 when a threshold is exceeded.
+
+    python soak_runner.py --hours 12 --speed 120 --mail-rate 60 --burst-every 90 --burst-size 40
+"""
+import argparse
+import csv
+import math
+import os
+import random
+import statistics
+import sys
+import tempfile
+import threading
+import time
+from collections import OrderedDict, deque
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+for folder in ("shift_alert_assistant_modular", "Email_Categorizer_Outlook", "decision_history", "resource_watchdog"):
+    sys.path.insert(0, os.path.join(HERE, "..", folder))
+
+from fake_backends import FakeMailbox, FakeWhatsAppWeb, MailGenerator, ScaledClock, install_fake_modules
+from resource_watchdog import process_handles, process_rss_mb
+
+MAILBOX = "LE-HELPDESK.PH@fpt.com"
+
+# === Helpers ===
+def poisson(rng, lam):
+    """Number of arrivals in an interval with expected count `lam` (Knuth's method)."""
+    limit, k, p = math.exp(-lam), 0, rng.random()
+    while p > limit:
+        k += 1
+        p *= rng.random()
+    return k
+
+def percentile(values, q):
+    if not values:
+        return float("nan")
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * q))]
+
+# === Soak run ===
+class SoakRun:
+    def __init__(self, args):
+        self.args = args
+        self.clock = ScaledClock(args.speed)
+        self.workdir = tempfile.mkdtemp(prefix="l1_soak_")
+        os.environ["L1_DECISION_DB"] = os.path.join(self.workdir, "history.db")
+
+        self.mailbox = FakeMailbox(MAILBOX)
+        self.whatsapp = FakeWhatsAppWeb(os.path.join(self.workdir, "whatsapp.html"))
+        self.music = install_fake_modules(self.mailbox, self.whatsapp)
+        self.generator = MailGenerator()
+        self.random = random.Random(args.seed)
+
+        self.injected = []          # every FakeMailItem delivered
+        self.wa_latencies = []      # simulated seconds, injection -> UnreadDetected
+        self.samples = []
+        self.ui_log_lines = []      # what the Tk log widget would hold (it is never trimmed)
+        self.categorizer_log_lines = []
+        self.stop_event = threading.Event()
+
+    # --- stack setup ---
+    def start_support_companion(self):
+        import SupportCompanionModular as scm
+        import event_bus
+        scm.time = self.clock
+
+        self.scm = scm
+        self.bus = scm.EventBus()
+        self.ui_events = self.bus.subscribe("ui", maxsize=1000, policy=event_bus.DROP_OLDEST)
+        self.detections = self.bus.subscribe("soak", (event_bus.UnreadDetected,), maxsize=10000, policy=event_bus.BLOCK)
+        self.alarm_player = scm.AlarmPlayer()
+        self.services = [scm.MetricsCollector(self.bus)]
+        store = scm.open_store("support_companion") if scm.open_store else None
+        if store:
+            self.services.append(scm.HistoryRecorder(self.bus, store))
+        for service in self.services:
+            service.start()
+        # Monitors and the alarm are tasks on one runtime loop; its sleeps are scaled like the clock
+        self.runtime = scm.SourceRuntime(speed=self.clock.speed)
+        self.runtime.start()
+        self.runtime.start_task("alarm", scm.AlarmService(self.bus, self.alarm_player))
+        for name in ("email", "whatsapp"):
+            monitor_class = scm.sources.load_source(name)
+            self.runtime.start_task(name, monitor_class(self.bus))
+
+    def start_categorizer(self):
+        import email_categorizer_outlook as eco
+        from conversation_index import ConversationIndex
+        from message_queue import DEFAULT_DEADLINES
+        eco.time = self.clock
+
+        # Headless EmailCategorizerApp: same rule set and monitor loop, no Tk widgets
+        app = eco.EmailCategorizerApp.__new__(eco.EmailCategorizerApp)
+        app.configure_rules()
+        app.shared_mailbox = MAILBOX
+        app.conversation_index = ConversationIndex(os.path.join(self.workdir, "conversation_index.json"))
+        app.model = None
+        app.decision_store = eco.open_store("categorizer") if eco.open_store else None
+        app.recorded_skips = OrderedDict()
+        app.reconnect_requested = False
+        app.coordinator = None
+        # Queue timings are real seconds; scale them like the sleeps so the queue behaves as in a real shift
+        speed = self.clock.speed
+        app.message_queue = eco.MessageQueue(deadlines={p: d / speed for p, d in DEFAULT_DEADLINES.items()})
+        app.known_messages = OrderedDict()
+        app.recheck_due = deque()
+        app.newest_received = None
+        app.last_full_scan = 0.0
+        eco.DRAIN_BUDGET_S /= speed
+        eco.RECHECK_AFTER_S /= speed
+        eco.FULL_SCAN_S /= speed  # DISCOVERY_OVERLAP_S is not scaled: it covers ReceivedTime, which is wall-clock
+        app.allowed_categories = {"KARL": "green", "ADRIAN": "yellow"}
+        app.selected_category = "KARL"
+        app.running = True
+        app.log_message = self.categorizer_log_lines.append
+        app.stop_monitoring = lambda: setattr(app, "running", False)
+        self.categorizer = app
+        self.categorizer_thread = threading.Thread(target=app.monitor_emails, daemon=True)
+        self.categorizer_thread.start()
+
+    # --- background actors ---
+    def ui_pump(self):
+        # Stand-in for SupportCompanionApp.pump_events on the Tk tick
+        while not self.stop_event.wait(0.1):
+            for event in self.ui_events.drain(200):
+                self.ui_log_lines.append(getattr(event, "message", ""))
+
+    def detection_watcher(self):
+        while not self.stop_event.is_set():
+            event = self.detections.get(timeout=0.2)
+            if event is None or event.count <= 0:
+                continue
+            now = time.monotonic()
+            if event.source == "email":
+                for item in self.mailbox.restrict(unread_only=True):
+                    if item.detected_at is None:
+                        item.detected_at = now
+            elif event.source == "whatsapp":
+                with self.whatsapp.lock:
+                    pending, self.whatsapp.pending = self.whatsapp.pending, []
+                self.wa_latencies.extend(self.clock.sim(now - t) for t in pending)
+
+    def injector(self):
+        args = self.args
+        next_burst = args.burst_every * 60 if args.burst_every else None
+        next_ack = args.ack_every * 60
+        last = self.clock.sim_now()
+        while not self.stop_event.is_set():
+            self.clock.sleep(1.0)
+            now = self.clock.sim_now()
+            elapsed, last = now - last, now
+
+            arrivals = poisson(self.random, args.mail_rate / 3600 * elapsed)
+            if next_burst is not None and now >= next_burst:
+                arrivals += args.burst_size
+                next_burst += args.burst_every * 60
+            for _ in range(arrivals):
+                self.injected.append(self.mailbox.deliver(self.generator.next_item()))
+
+            if poisson(self.random, args.wa_rate / 3600 * elapsed):
+                self.whatsapp.inject(self.random.randint(1, 3))
+
+            if now >= next_ack:
+                # The agent acknowledges: reads old mail, clears WhatsApp, silences the alarm
+                self.mailbox.mark_read(time.monotonic() - args.read_after * 60 / args.speed)
+                self.whatsapp.set_unread([])
+                self.alarm_player.stop_alarm()
+                next_ack += args.ack_every * 60
+
+    def sample(self):
+        categorized = [i for i in self.injected if i.categorized_at]
+        stats = self.bus.stats()
+        self.samples.append({
+            "sim_hours": round(self.clock.sim_now() / 3600, 3),
+            "rss_mb": round(process_rss_mb() or float("nan"), 1),
+            "threads": threading.active_count(),
+            "handles": process_handles() or -1,
+            "injected": len(self.injected),
+            "categorized": len(categorized),
+            "unread_in_mailbox": len(self.mailbox.restrict(unread_only=True)),
+            "ui_log_lines": len(self.ui_log_lines),
+            "categorizer_log_lines": len(self.categorizer_log_lines),
+            "bus_published": stats["published"],
+            "bus_dropped": sum(s["dropped"] for s in stats["subscribers"].values()),
+            "restrict_calls": len(self.mailbox.restrict_times),
+        })
+
+    # --- run ---
+    def run(self):
+        self.start_support_companion()
+        self.start_categorizer()
+        actors = [threading.Thread(target=t, daemon=True) for t in (self.ui_pump, self.detection_watcher, self.injector)]
+        for actor in actors:
+            actor.start()
+
+        duration_real = self.args.hours * 3600 / self.args.speed
+        sample_real = self.args.sample_every * 60 / self.args.speed
+        end = time.monotonic() + duration_real
+        self.sample()
+        while time.monotonic() < end:
+            time.sleep(min(sample_real, max(0, end - time.monotonic())))
+            self.sample()
+            last = self.samples[-1]
+            print(f"[{last['sim_hours']:6.2f}h] rss={last['rss_mb']}MB threads={last['threads']} "
+                  f"handles={last['handles']} injected={last['injected']} categorized={last['categorized']}",
+                  flush=True)
+
+        self.stop_event.set()
+        self.runtime.shutdown()
+        for service in self.services:
+            service.stop()
+        self.categorizer.running = False
+        self.categorizer_thread.join(5)
+        for actor in actors:
+            actor.join(5)
+
+    # --- report ---
+    def summary(self):
+        sim = self.clock.sim
+        email_latency = [sim(i.detected_at - i.injected_at) for i in self.injected if i.detected_at]
+        categorize_latency = [sim(i.categorized_at - i.injected_at) for i in self.injected if i.categorized_at]
+        polls = self.mailbox.restrict_times
+        # Restrict calls come from two pollers (SupportCompanion every 10s, categorizer every 3s); report the gaps overall
+        gaps = [sim(b - a) for a, b in zip(polls, polls[1:])]
+        warm = self.samples[min(len(self.samples) - 1, max(1, len(self.samples) // 10))]
+        last = self.samples[-1]
+        return {
+            "sim_hours": last["sim_hours"],
+            "mails_injected": len(self.injected),
+            "mails_categorized": len(categorize_latency),
+            "categorized_per_sim_hour": len(categorize_latency) / max(last["sim_hours"], 1e-9),
+            "email_detect_p50_s": percentile(email_latency, 0.5),
+            "email_detect_p95_s": percentile(email_latency, 0.95),
+            "categorize_p50_s": percentile(categorize_latency, 0.5),
+            "categorize_p95_s": percentile(categorize_latency, 0.95),
+            "whatsapp_detect_p95_s": percentile(self.wa_latencies, 0.95),
+            "poll_gap_max_s": max(gaps) if gaps else float("nan"),
+            "poll_gap_mean_s": statistics.mean(gaps) if gaps else float("nan"),
+            "rss_growth_mb": last["rss_mb"] - warm["rss_mb"],
+            "thread_growth": last["threads"] - warm["threads"],
+            "handle_growth": last["handles"] - warm["handles"],
+            "ui_log_lines": last["ui_log_lines"],
+            # The Tk log widget is the one structure that grows with run time; its rate after warm-up
+            "ui_log_lines_per_hour": (last["ui_log_lines"] - warm["ui_log_lines"])
+                                     / max(last["sim_hours"] - warm["sim_hours"], 1e-9),
+        }
+
+    def check(self, summary):
+        args = self.args
+        checks = [
+            ("rss_growth_mb", summary["rss_growth_mb"], args.max_rss_growth_mb),
+            ("thread_growth", summary["thread_growth"], args.max_thread_growth),
+            ("handle_growth", summary["handle_growth"], args.max_handle_growth),
+            ("ui_log_lines_per_hour", summary["ui_log_lines_per_hour"], args.max_ui_log_lines_per_hour),
+            ("email_detect_p95_s", summary["email_detect_p95_s"], args.max_detect_p95),
+            ("categorize_p95_s", summary["categorize_p95_s"], args.max_categorize_p95),
+        ]
+        # NaN (no data) never counts as a failure
+        return [(name, value, limit) for name, value, limit in checks if value == value and value > limit]
+
+    def write_samples(self, path):
+        with open(path, "w", newline="", encoding="utf-8") as f:
+            writer = csv.DictWriter(f, fieldnames=list(self.samples[0]))
+            writer.writeheader()
+            writer.writerows(self.samples)
+
+def main():
+    parser = argparse.ArgumentParser(description="Soak-test the monitor stack against simulated Outlook/WhatsApp.")
+    parser.add_argument("--hours", type=float, default=12, help="simulated shift length")
+    parser.add_argument("--speed", type=float, default=120, help="simulated seconds per real second")
+    parser.add_argument("--mail-rate", type=float, default=60, help="mails per simulated hour (Poisson)")
+    parser.add_argument("--burst-every", type=float, default=90, help="simulated minutes between bursts (0 = none)")
+    parser.add_argument("--burst-size", type=int, default=40)
+    parser.add_argument("--wa-rate", type=float, default=6, help="WhatsApp messages per simulated hour")
+    parser.add_argument("--ack-every", type=float, default=15, help="simulated minutes between agent acknowledgements")
+    parser.add_argument("--read-after", type=float, default=10, help="agent reads mail older than N simulated minutes")
+    parser.add_argument("--sample-every", type=float, default=15, help="simulated minutes between samples")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--out", default="soak_samples.csv")
+    parser.add_argument("--max-rss-growth-mb", type=float, default=50)
+    parser.add_argument("--max-thread-growth", type=int, default=2)
+    parser.add_argument("--max-handle-growth", type=int, default=20)
+    parser.add_argument("--max-ui-log-lines-per-hour", type=float, default=3000, help="per simulated hour")
+    parser.add_argument("--max-detect-p95", type=float, default=15, help="simulated seconds")
+    parser.add_argument("--max-categorize-p95", type=float, default=10, help="simulated seconds")
+    args = parser.parse_args()
+
+    run = SoakRun(args)
+    run.run()
+    run.write_samples(args.out)
+
+    summary = run.summary()
+    print("\n=== Soak summary ===")
+    for key, value in summary.items():
+        print(f"{key:<26} {value:,.2f}" if isinstance(value, float) else f"{key:<26} {value}")
+    print(f"samples written to {args.out}")
+
+    failures = run.check(summary)
+    if failures:
+        for name, value, limit in failures:
+            print(f"❌ {name} = {value:,.2f} exceeds {limit}")
+        sys.exit(1)
+    print("✅ All soak thresholds met")
+
+if __name__ == "__main__":
+    main()